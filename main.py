@@ -4,6 +4,7 @@ import asyncio
 import logging
 import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import uvicorn
@@ -13,6 +14,7 @@ from src.services.config import get_settings
 from src.services.fastapi_app import create_app
 from src.services.scheduler import scheduler
 from src.bot.telegram_bot import create_bot_application
+from src.bot.handlers import close_http_clients
 from src.models import DatabaseManager
 
 logging.basicConfig(
@@ -32,6 +34,9 @@ async def startup_event():
     """Initialize services on startup."""
     global bot_application
     
+    # Handlers run blocking DB calls in the default executor; size it for bursts
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=20))
+    
     # Initialize database
     db_manager = DatabaseManager(settings.database_url)
     db_manager.create_tables()
@@ -69,6 +74,7 @@ async def shutdown_event():
     if bot_application:
         await bot_application.stop()
         await bot_application.shutdown()
+        await close_http_clients()
     
     logger.info("Application shutdown complete")
 
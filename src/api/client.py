@@ -1,9 +1,13 @@
 """JCYL Explore API v2.1 client."""
 
+import asyncio
+import html
 import logging
 import re
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import cached_property, lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
 import httpx
@@ -11,6 +15,18 @@ from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+# C0/C1 control characters (newlines and tabs included)
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+
+# Anything clean_text_for_markdown would have to rewrite
+_MARKDOWN_UNSAFE_RE = re.compile(r'[&_`\[\]#|*\x00-\x1f\x7f-\x9f]')
+
+# Abbreviation entries look like "ABBR: definition", one after another
+_ABBR_RE = re.compile(
+    r'\b([A-ZÁÉÍÓÚÑ][^\s:]{0,9})\s*:\s*(.+?)(?=\s+[A-ZÁÉÍÓÚÑ][^\s:]{0,9}\s*:|$)',
+    re.DOTALL
+)
+
 
 def clean_html_text(text: str) -> str:
     """Remove HTML tags and clean up text."""
@@ -85,6 +101,150 @@ def format_user_friendly_date(date_string: str) -> str:
         return "Fecha no disponible"
 
 
+@lru_cache(maxsize=4096)
+def clean_text_for_markdown(text: str) -> str:
+    """Clean text for safe use in Markdown messages."""
+    if not text:
+        return "Sin título"
+    
+    # Fast path: nothing to unescape, replace or strip
+    if not _MARKDOWN_UNSAFE_RE.search(text):
+        return text.strip()
+    
+    # Remove HTML entities first
+    clean_text = html.unescape(text)
+    
+    # Handle bold formatting first - preserve **text** as actual bold
+    # This regex finds **text** patterns and preserves them
+    
+    # Replace problematic characters but preserve intentional markdown
+    clean_text = clean_text.replace('_', '-').replace('`', "'")
+    clean_text = clean_text.replace('[', '(').replace(']', ')')
+    clean_text = clean_text.replace('#', 'No.').replace('|', '-')
+    
+    # Handle asterisks more carefully - only replace standalone ones, not ** pairs
+    # First, temporarily replace ** patterns with placeholders
+    bold_patterns = re.findall(r'\*\*([^*]+)\*\*', clean_text)
+    placeholders = {}
+    for i, pattern in enumerate(bold_patterns):
+        placeholder = f"__BOLD_{i}__"
+        placeholders[placeholder] = f"**{pattern}**"
+        clean_text = clean_text.replace(f"**{pattern}**", placeholder, 1)
+    
+    # Now replace remaining single asterisks
+    clean_text = clean_text.replace('*', '•')
+    
+    # Restore bold patterns
+    for placeholder, bold_text in placeholders.items():
+        clean_text = clean_text.replace(placeholder, bold_text)
+    
+    # Remove any remaining control characters
+    clean_text = _CONTROL_CHARS_RE.sub('', clean_text)
+    
+    # Trim and return
+    return clean_text.strip()
+
+
+@lru_cache(maxsize=2048)
+def format_description(description: str) -> str:
+    """Format dataset description with better structure and readability."""
+    if not description or description == "Dato no disponible":
+        return "Dato no disponible"
+    
+    # Clean the text first
+    clean_desc = clean_text_for_markdown(description)
+    
+    # Check for abbreviations section
+    if 'ABREVIATURAS EMPLEADAS:' in clean_desc.upper():
+        # Split main description from abbreviations
+        upper_desc = clean_desc.upper()
+        abbrev_start = upper_desc.find('ABREVIATURAS EMPLEADAS:')
+        
+        main_desc = clean_desc[:abbrev_start].strip()
+        abbrev_section = clean_desc[abbrev_start:].strip()
+        
+        # Format main description with paragraph breaks
+        formatted_main = format_main_description(main_desc)
+        
+        # Format abbreviations
+        formatted_abbrevs = format_abbreviations(abbrev_section)
+        
+        # Combine both parts
+        if formatted_abbrevs:
+            result = formatted_main + "\n\n" + formatted_abbrevs
+        else:
+            result = formatted_main
+    else:
+        # No abbreviations, just format as regular text
+        result = format_main_description(clean_desc)
+    
+    # Limit total length for Telegram
+    if len(result) > 1500:
+        result = result[:1500] + "\n\n_... descripción truncada por longitud_"
+    
+    return result
+
+
+def format_main_description(text: str) -> str:
+    """Format the main description part."""
+    if not text:
+        return ""
+    
+    # Split into sentences: a period ends a sentence once it is more than
+    # 30 chars long and is followed by whitespace, an uppercase letter or the end
+    sentences = []
+    start = 0
+    end = text.find('.', 30)
+    
+    while end != -1:
+        next_char = text[end + 1:end + 2]
+        if not next_char or next_char.isspace() or next_char.isupper():
+            sentences.append(text[start:end + 1].strip())
+            start = end + 1
+            end = text.find('.', start + 30)
+        else:
+            end = text.find('.', end + 1)
+    
+    if text[start:].strip():
+        sentences.append(text[start:].strip())
+    
+    # Group sentences into paragraphs (max 2 sentences per paragraph)
+    paragraphs = []
+    current_para = []
+    
+    for sentence in sentences:
+        current_para.append(sentence)
+        if len(current_para) >= 2 or len(sentence) > 250:
+            paragraphs.append(' '.join(current_para))
+            current_para = []
+    
+    if current_para:
+        paragraphs.append(' '.join(current_para))
+    
+    return '\n\n'.join(paragraphs)
+
+
+def format_abbreviations(abbrev_text: str) -> str:
+    """Format abbreviations section."""
+    if not abbrev_text or ':' not in abbrev_text:
+        return ""
+    
+    # Extract just the abbreviations part
+    if 'ABREVIATURAS EMPLEADAS:' in abbrev_text:
+        abbrev_content = abbrev_text.split('ABREVIATURAS EMPLEADAS:', 1)[1].strip()
+    else:
+        abbrev_content = abbrev_text
+    
+    items = _ABBR_RE.findall(abbrev_content)
+    if not items:
+        return ""
+    
+    formatted_abbrevs = ["**ABREVIATURAS:**"]
+    formatted_abbrevs.extend(f"• **{abbr}:** {definition.strip()}" for abbr, definition in items)
+    
+    return '\n'.join(formatted_abbrevs)
+
+
 class Dataset(BaseModel):
     dataset_id: str
     title: str = Field(default="Dato no disponible")
@@ -98,6 +258,22 @@ class Dataset(BaseModel):
     themes: List[str] = Field(default_factory=list)
     keywords: List[str] = Field(default_factory=list)
 
+    # Escaped/formatted renderings, computed once per dataset on first access
+    @cached_property
+    def title_md(self) -> str:
+        """Title safe to embed in Markdown messages."""
+        return clean_text_for_markdown(self.title)
+
+    @cached_property
+    def title_html(self) -> str:
+        """Title safe to embed in HTML messages."""
+        return html.escape(self.title or "Sin título", quote=False)
+
+    @cached_property
+    def description_md(self) -> str:
+        """Description formatted for Markdown messages."""
+        return format_description(self.description)
+
 
 def create_dataset_from_api(data: dict) -> Dataset:
     """Create Dataset from API response data."""
@@ -153,11 +329,16 @@ class Attachment(BaseModel):
 
 
 class JCYLAPIClient:
-    def __init__(self, base_url: str = "https://analisis.datosabiertos.jcyl.es"):
+    def __init__(self, base_url: str = "https://analisis.datosabiertos.jcyl.es", cache_ttl: float = 0):
         self.base_url = base_url
         self.client = httpx.AsyncClient(timeout=30.0)
         # Simple cache to store consistent totals per theme/search
         self._total_cache = {}
+        # Optional TTL cache of facet/dataset listings (disabled when cache_ttl is 0)
+        self.cache_ttl = cache_ttl
+        self._response_cache: Dict[Tuple, Tuple[float, Any]] = {}
+        # key -> [lock, callers holding or waiting on it]; removed when the last caller leaves
+        self._cache_locks: Dict[Tuple, List] = {}
 
     async def close(self) -> None:
         await self.client.aclose()
@@ -177,7 +358,51 @@ class JCYLAPIClient:
             logger.error(f"Error fetching {url}: {e}")
             raise
 
+    async def _cached(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a fresh cached result for key, or fetch it once for all concurrent callers."""
+        if not self.cache_ttl:
+            return await fetch()
+        
+        entry = self._response_cache.get(key)
+        if entry and time.monotonic() - entry[0] < self.cache_ttl:
+            return entry[1]
+        
+        slot = self._cache_locks.get(key)
+        if slot is None:
+            slot = self._cache_locks[key] = [asyncio.Lock(), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                # Another caller may have filled the entry while we waited
+                entry = self._response_cache.get(key)
+                if entry and time.monotonic() - entry[0] < self.cache_ttl:
+                    return entry[1]
+                
+                result = await fetch()
+                # Empty results are what the fetchers return on errors; don't pin them
+                if result and (not isinstance(result, tuple) or any(result)):
+                    self._prune_cache()
+                    self._response_cache[key] = (time.monotonic(), result)
+                return result
+        finally:
+            slot[1] -= 1
+            if not slot[1]:
+                del self._cache_locks[key]
+
+    def _prune_cache(self) -> None:
+        """Drop expired entries once the cache grows large."""
+        if len(self._response_cache) < 512:
+            return
+        now = time.monotonic()
+        for key, (stored_at, _) in list(self._response_cache.items()):
+            if now - stored_at >= self.cache_ttl:
+                del self._response_cache[key]
+
     async def get_catalog_facets(self, facet: str, refine: Optional[Dict[str, str]] = None) -> List[Facet]:
+        key = ("facets", facet, tuple(sorted(refine.items())) if refine else None)
+        return await self._cached(key, lambda: self._fetch_catalog_facets(facet, refine))
+
+    async def _fetch_catalog_facets(self, facet: str, refine: Optional[Dict[str, str]] = None) -> List[Facet]:
         url = self._build_url("/api/explore/v2.1/catalog/facets")
         params = {"facet": facet, "lang": "es"}
         
@@ -221,7 +446,23 @@ class JCYLAPIClient:
         limit: int = 10,
         offset: int = 0,
         order_by: str = "-metadata_processed",
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        where: Optional[str] = None
+    ) -> tuple[List[Dataset], int]:
+        key = ("datasets", theme, keyword, limit, offset, order_by, search, where)
+        return await self._cached(
+            key, lambda: self._fetch_datasets(theme, keyword, limit, offset, order_by, search, where)
+        )
+
+    async def _fetch_datasets(
+        self, 
+        theme: Optional[str] = None, 
+        keyword: Optional[str] = None,
+        limit: int = 10,
+        offset: int = 0,
+        order_by: str = "-metadata_processed",
+        search: Optional[str] = None,
+        where: Optional[str] = None
     ) -> tuple[List[Dataset], int]:
         url = self._build_url("/api/explore/v2.1/catalog/datasets")
         
@@ -254,6 +495,8 @@ class JCYLAPIClient:
                 
                 if keyword:
                     params["refine.default.keyword"] = keyword
+                if where:
+                    params["where"] = where
                 
                 try:
                     logger.info(f"Fetching batch: offset={current_offset}, limit={max_api_limit}")
@@ -449,6 +692,8 @@ class JCYLAPIClient:
             
             if keyword:
                 params["refine.default.keyword"] = keyword
+            if where:
+                params["where"] = where
             
             try:
                 logger.info(f"Getting datasets with params: {params}")
@@ -472,6 +717,10 @@ class JCYLAPIClient:
                 return [], 0
 
     async def get_dataset_info(self, dataset_id: str) -> Optional[Dataset]:
+        # Cached instances keep their computed title_md/title_html renderings
+        return await self._cached(("dataset_info", dataset_id), lambda: self._fetch_dataset_info(dataset_id))
+
+    async def _fetch_dataset_info(self, dataset_id: str) -> Optional[Dataset]:
         url = self._build_url(f"/api/explore/v2.1/catalog/datasets/{dataset_id}")
         params = {"lang": "es"}
 
@@ -1,22 +1,31 @@
 """Telegram bot message handlers."""
 
+import asyncio
 import logging
+from collections import OrderedDict
+from functools import lru_cache
+from heapq import nlargest
+from operator import attrgetter
 from typing import Optional
-import httpx
-import os
-from datetime import datetime, timedelta
-import pandas as pd
 import io
-import tempfile
+import re
+import time
+import traceback
+from datetime import date, datetime, timedelta
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ChatAction
 from telegram.ext import ContextTypes
 import html
+import httpx
 
 from ..api import JCYLAPIClient
-from ..api.client import format_user_friendly_date
+from ..api.client import clean_text_for_markdown, format_user_friendly_date
 from ..models import DatabaseManager
+from ..services.alerts import clean_dataset_title, clean_publisher_name, format_date_for_user
+from ..services.catalog_export import write_catalog_xlsx
 from ..services.config import get_settings
+from ..services.daily_summary import DailySummaryService
 from ..models.callback_map import callback_mapper
 from .keyboards import (
     create_themes_keyboard,
@@ -28,199 +37,170 @@ from .keyboards import (
     create_subscriptions_keyboard,
     create_unsubscribe_confirm_keyboard,
     create_search_results_keyboard,
-    create_recent_datasets_keyboard
+    create_recent_datasets_keyboard,
+    _HOME_BUTTON,
+    _HOME_ROW,
+    _shorten
 )
 
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
 db_manager = DatabaseManager(settings.database_url)
-api_client = JCYLAPIClient(settings.jcyl_api_base_url)
+# Interactive browsing tolerates slightly stale listings; alerts use their own uncached client
+api_client = JCYLAPIClient(settings.jcyl_api_base_url, cache_ttl=300)
+# File downloads share one connection pool so repeat downloads skip the TCP/TLS setup
+_download_client = httpx.AsyncClient(
+    timeout=60.0,
+    limits=httpx.Limits(max_keepalive_connections=16)
+)
 
-# Global storage for alert navigation state (user_id -> alert data)
-alert_sessions = {}
 
+# One daily summary service (own DB engine and API client) shared by all summary requests
+daily_service = DailySummaryService()
 
-def escape_markdown_v2(text: str) -> str:
-    """Escape special characters for Markdown V2 format."""
-    if not text:
-        return ""
-    
-    # Characters that need to be escaped in Markdown V2
-    special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-    
-    # Replace each special character with escaped version
-    escaped_text = text
-    for char in special_chars:
-        escaped_text = escaped_text.replace(char, f'\\{char}')
-    
-    return escaped_text
 
+async def close_http_clients(_application=None) -> None:
+    """Close the shared download and daily summary clients (usable as a post_shutdown hook)."""
+    await _download_client.aclose()
+    await daily_service.close()
 
-def clean_text_for_markdown(text: str) -> str:
-    """Clean text for safe use in Markdown messages."""
-    if not text:
-        return "Sin título"
-    
-    # Remove HTML entities first
-    clean_text = html.unescape(text)
-    
-    # Handle bold formatting first - preserve **text** as actual bold
-    # This regex finds **text** patterns and preserves them
-    import re
-    
-    # Replace problematic characters but preserve intentional markdown
-    clean_text = clean_text.replace('_', '-').replace('`', "'")
-    clean_text = clean_text.replace('[', '(').replace(']', ')')
-    clean_text = clean_text.replace('#', 'No.').replace('|', '-')
-    
-    # Handle asterisks more carefully - only replace standalone ones, not ** pairs
-    # First, temporarily replace ** patterns with placeholders
-    bold_patterns = re.findall(r'\*\*([^*]+)\*\*', clean_text)
-    placeholders = {}
-    for i, pattern in enumerate(bold_patterns):
-        placeholder = f"__BOLD_{i}__"
-        placeholders[placeholder] = f"**{pattern}**"
-        clean_text = clean_text.replace(f"**{pattern}**", placeholder, 1)
-    
-    # Now replace remaining single asterisks
-    clean_text = clean_text.replace('*', '•')
+
+class _LRUDict(OrderedDict):
+    """Dict that evicts its least recently used entry beyond maxsize."""
     
-    # Restore bold patterns
-    for placeholder, bold_text in placeholders.items():
-        clean_text = clean_text.replace(placeholder, bold_text)
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
     
-    # Remove any remaining control characters
-    clean_text = ''.join(char for char in clean_text if char.isprintable())
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
     
-    # Trim and return
-    return clean_text.strip()
+    def __setitem__(self, key, value):
+        if key in self:
+            self.move_to_end(key)
+        super().__setitem__(key, value)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
 
 
-def format_description(description: str) -> str:
-    """Format dataset description with better structure and readability."""
-    if not description or description == "Dato no disponible":
-        return "Dato no disponible"
-    
-    # Clean the text first
-    clean_desc = clean_text_for_markdown(description)
-    
-    # Check for abbreviations section
-    if 'ABREVIATURAS EMPLEADAS:' in clean_desc.upper():
-        # Split main description from abbreviations
-        upper_desc = clean_desc.upper()
-        abbrev_start = upper_desc.find('ABREVIATURAS EMPLEADAS:')
-        
-        main_desc = clean_desc[:abbrev_start].strip()
-        abbrev_section = clean_desc[abbrev_start:].strip()
-        
-        # Format main description with paragraph breaks
-        formatted_main = format_main_description(main_desc)
-        
-        # Format abbreviations
-        formatted_abbrevs = format_abbreviations(abbrev_section)
-        
-        # Combine both parts
-        if formatted_abbrevs:
-            result = formatted_main + "\n\n" + formatted_abbrevs
-        else:
-            result = formatted_main
-    else:
-        # No abbreviations, just format as regular text
-        result = format_main_description(clean_desc)
-    
-    # Limit total length for Telegram
-    if len(result) > 1500:
-        result = result[:1500] + "\n\n_... descripción truncada por longitud_"
-    
-    return result
+# Global storage for alert navigation state (user_id -> alert data),
+# bounded so sessions of inactive users don't accumulate forever
+alert_sessions = _LRUDict(maxsize=1024)
 
+# Lista de IDs de administradores (configurable)
+ADMIN_TELEGRAM_IDS = [
+    # Añade tu Telegram ID aquí
+    # 123456789,  # Tu ID de Telegram
+]
+ADMIN_USERS_PER_PAGE = 20
+
+# Short-lived cache for portal statistics (key -> (monotonic timestamp, value))
+_STATS_CACHE_TTL = 300
+_stats_cache: dict = {}
+# Users with a stats refresh in flight (debounces double taps)
+_refreshing_stats_users: set = set()
+
+# Generated catalog workbook, reused for an hour (key -> (monotonic timestamp, bytes, dataset count))
+_CATALOG_CACHE_TTL = 3600
+_catalog_cache: dict = {}
+_catalog_lock = asyncio.Lock()
+
+# Shared single-button keyboards (telegram objects are immutable, safe to reuse)
+_HOME_KB = InlineKeyboardMarkup([_HOME_ROW])
+_RETRY_KB = InlineKeyboardMarkup([[InlineKeyboardButton("🔄 Reintentar", callback_data="start")]])
+_BACK_TO_THEMES_KB = InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Volver a categorías", callback_data="start")]])
+_HOME_AND_ALERTS_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔔 Mis alertas", callback_data="mis_alertas")],
+    _HOME_ROW
+])
+_HELP_KB = InlineKeyboardMarkup([[InlineKeyboardButton("🏠 Volver al inicio", callback_data="start")]])
+_STATS_KB = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🔍 Buscar Datasets", callback_data="start_search"),
+        InlineKeyboardButton("🕒 Recientes", callback_data="recent_datasets")
+    ],
+    _HOME_ROW
+])
+_REFRESH_STATS_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_stats")],
+    _HOME_ROW
+])
+
+# Characters that need to be escaped in Markdown V2
+_MARKDOWN_V2_SPECIAL_CHARS = frozenset('_*[]()~`>#+-=|{}.!')
+_MARKDOWN_V2_SPECIAL_RE = re.compile('[' + re.escape(''.join(sorted(_MARKDOWN_V2_SPECIAL_CHARS))) + ']')
+
+
+# "1. ", "2. ", ... prefixes for numbered lists; pages and favorites stay well below this
+_LIST_NUMBERS = tuple(f"{i}. " for i in range(1, 101))
+
+
+def _pack_callback(*parts) -> str:
+    """Join callback parts with ':', using a short ID when over Telegram's size limit."""
+    return _shorten(":".join(map(str, parts)))
+
+
+def _pack_dataset_callback(dataset_id: str) -> str:
+    """Build the 'dataset:<id>' callback."""
+    return _shorten(f"dataset:{dataset_id}")
+
+
+def _pack_fav_callback(index: int, dataset_id: str) -> str:
+    """Build the 'fav_num:<index>:<id>' callback used by the bookmarks keyboard."""
+    return _shorten(f"fav_num:{index}:{dataset_id}")
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Shorten text to limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else f"{text[:limit]}…"
+
+
+# Fire-and-forget tasks, referenced here so they are not garbage-collected before finishing
+_background_tasks: set = set()
 
-def format_main_description(text: str) -> str:
-    """Format the main description part."""
-    if not text:
-        return ""
-    
-    # Split into sentences and create paragraphs
-    sentences = []
-    current = ""
-    
-    for char in text:
-        current += char
-        if char == '.' and len(current) > 30:
-            # Check if next character indicates end of sentence
-            remaining = text[len(' '.join(sentences)) + len(current):]
-            if (not remaining or remaining[0].isspace() or remaining[0].isupper() or
-                remaining.startswith(' (por ejemplo')):
-                sentences.append(current.strip())
-                current = ""
-    
-    if current.strip():
-        sentences.append(current.strip())
-    
-    # Group sentences into paragraphs (max 2 sentences per paragraph)
-    paragraphs = []
-    current_para = []
-    
-    for sentence in sentences:
-        current_para.append(sentence)
-        if len(current_para) >= 2 or len(' '.join(current_para)) > 250:
-            paragraphs.append(' '.join(current_para))
-            current_para = []
-    
-    if current_para:
-        paragraphs.append(' '.join(current_para))
-    
-    return '\n\n'.join(paragraphs)
 
+def _background_task_done(task: asyncio.Task) -> None:
+    """Forget a finished background task and log its failure, if any."""
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug(f"Background task failed: {task.exception()!r}")
 
-def format_abbreviations(abbrev_text: str) -> str:
-    """Format abbreviations section."""
-    if not abbrev_text or ':' not in abbrev_text:
+
+def _run_in_background(coro) -> None:
+    """Schedule coro without awaiting it."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+
+
+async def _run_db(fn, *args, **kwargs):
+    """Run a blocking DatabaseManager call in the default executor."""
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+async def _get_user_db_id(telegram_id: int, context) -> int:
+    """Return the user's database ID, memoized in context.user_data."""
+    user_db_id = context.user_data.get("user_db_id")
+    if user_db_id is None:
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=telegram_id)
+        context.user_data["user_db_id"] = user_db_id
+    return user_db_id
+
+
+def escape_markdown_v2(text: str) -> str:
+    """Escape special characters for Markdown V2 format."""
+    if not text:
         return ""
     
-    # Extract just the abbreviations part
-    if 'ABREVIATURAS EMPLEADAS:' in abbrev_text:
-        abbrev_content = abbrev_text.split('ABREVIATURAS EMPLEADAS:', 1)[1].strip()
-    else:
-        abbrev_content = abbrev_text
-    
-    formatted_abbrevs = ["**ABREVIATURAS:**"]
-    
-    # Simple manual parsing approach
-    current_abbr = ""
-    current_def = ""
-    i = 0
-    
-    while i < len(abbrev_content):
-        char = abbrev_content[i]
-        
-        if char.isupper() and not current_abbr:
-            # Start of new abbreviation
-            current_abbr = char
-        elif char.isupper() and current_abbr and current_def:
-            # New abbreviation starting, finish previous one
-            if current_abbr and current_def.strip():
-                formatted_abbrevs.append(f"• **{current_abbr}:** {current_def.strip()}")
-            current_abbr = char
-            current_def = ""
-        elif char == ':' and current_abbr:
-            # End of abbreviation, start definition
-            i += 1  # Skip the colon
-            current_def = ""
-        elif current_abbr and char != ':':
-            if not current_def and char != ' ':
-                current_abbr += char
-            else:
-                current_def += char
-        
-        i += 1
-    
-    # Add the last abbreviation
-    if current_abbr and current_def.strip():
-        formatted_abbrevs.append(f"• **{current_abbr}:** {current_def.strip()}")
+    # Most short strings (IDs, dates) need no escaping at all
+    if not _MARKDOWN_V2_SPECIAL_RE.search(text):
+        return text
     
-    return '\n'.join(formatted_abbrevs) if len(formatted_abbrevs) > 1 else ""
+    # Escape every special character in a single pass
+    return ''.join(f'\\{char}' if char in _MARKDOWN_V2_SPECIAL_CHARS else char for char in text)
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -229,19 +209,21 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     if not user:
         return
     
-    # Save/update user in database
-    db_manager.get_or_create_user(
-        telegram_id=user.id,
-        username=user.username,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        language_code=user.language_code or "es"
-    )
-    
     try:
         logger.info("Getting themes for start command...")
-        # Using global API client instance to maintain cache consistency
-        themes = await api_client.get_themes_with_real_counts()
+        # Save/update user in database (in a worker thread) while the themes
+        # are fetched, using the global API client to keep cache consistency
+        _, themes = await asyncio.gather(
+            _run_db(
+                db_manager.get_or_create_user,
+                telegram_id=user.id,
+                username=user.username,
+                first_name=user.first_name,
+                last_name=user.last_name,
+                language_code=user.language_code or "es"
+            ),
+            api_client.get_themes_with_real_counts()
+        )
         
         logger.info(f"Received {len(themes)} themes")
         if not themes:
@@ -253,7 +235,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         keyboard = create_themes_keyboard(themes, per_page=settings.themes_per_page)
         
         # Get popular categories to show in welcome message
-        popular_themes = sorted(themes, key=lambda x: x.count, reverse=True)[:3]
+        popular_themes = nlargest(3, themes, key=attrgetter('count'))
         popular_examples = ", ".join([theme.name for theme in popular_themes])
         
         message = (
@@ -285,7 +267,6 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         
     except Exception as e:
         logger.error(f"Error in start_command: {e}")
-        import traceback
         traceback.print_exc()
         await update.message.reply_text(
             f"❌ Error al cargar las categorías: {str(e)}\n\nInténtalo más tarde."
@@ -364,9 +345,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             sub_id = int(data.split(":", 1)[1])
             await handle_unsubscribe(query, context, sub_id)
         elif data == "start_search":
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-            ])
+            keyboard = _HOME_KB
             await query.edit_message_text(
                 "🔍 <b>Búsqueda de Datasets</b>\n\n"
                 "Para buscar, usa el comando:\n"
@@ -409,6 +388,9 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await show_export_menu(query, context, dataset_id)
         elif data.startswith("daily_summary:"):
             await handle_daily_summary_callback(query, context)
+        elif data.startswith("admin_users:"):
+            page = int(data.split(":", 1)[1])
+            await show_admin_users_page(query, context, page)
         elif data.startswith("alert_nav:"):
             await handle_alert_navigation(query, context)
         elif data.startswith("download_file:"):
@@ -418,9 +400,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             # Ignore the header callback - it's just for display
             await query.answer()
         else:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-            ])
+            keyboard = _HOME_KB
             await query.edit_message_text(
                 "❌ Opción no reconocida.",
                 reply_markup=keyboard
@@ -428,9 +408,7 @@ async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             
     except Exception as e:
         logger.error(f"Error in handle_callback: {e}")
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-        ])
+        keyboard = _HOME_KB
         await query.edit_message_text(
             "❌ Error procesando la solicitud.",
             reply_markup=keyboard
@@ -443,9 +421,7 @@ async def show_themes(query, context, page: int = 0) -> None:
         # Using global API client instance to maintain cache consistency
         themes = await api_client.get_themes_with_real_counts()
         if not themes:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔄 Reintentar", callback_data="start")]
-            ])
+            keyboard = _RETRY_KB
             await query.edit_message_text(
                 "❌ No se encontraron categorías.",
                 reply_markup=keyboard
@@ -456,7 +432,7 @@ async def show_themes(query, context, page: int = 0) -> None:
         
         total_pages = (len(themes) + settings.themes_per_page - 1) // settings.themes_per_page
         # Get some popular categories for the message
-        popular_themes = sorted(themes, key=lambda x: x.count, reverse=True)[:3]
+        popular_themes = nlargest(3, themes, key=attrgetter('count'))
         popular_list = ", ".join([f"{theme.name} ({theme.count})" for theme in popular_themes])
         
         message = (
@@ -476,9 +452,7 @@ async def show_themes(query, context, page: int = 0) -> None:
         
     except Exception as e:
         logger.error(f"Error in show_themes: {e}")
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔄 Reintentar", callback_data="start")]
-        ])
+        keyboard = _RETRY_KB
         await query.edit_message_text(
             "❌ Error al cargar las categorías.",
             reply_markup=keyboard
@@ -519,9 +493,7 @@ async def show_datasets(query, context, theme_name: str, page: int = 0) -> None:
         logger.info(f"Received {len(datasets)} datasets out of {real_total_count} total (from facets)")
         
         if not datasets:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("⬅️ Volver a categorías", callback_data="start")]
-            ])
+            keyboard = _BACK_TO_THEMES_KB
             message = f"❌ No se encontraron datasets en la categoría '{theme_name}'"
             await query.edit_message_text(
                 message + ".",
@@ -532,12 +504,11 @@ async def show_datasets(query, context, theme_name: str, page: int = 0) -> None:
         keyboard = create_datasets_keyboard(datasets, theme_name, page, settings.datasets_per_page)
         total_pages = (real_total_count + settings.datasets_per_page - 1) // settings.datasets_per_page
         
-        # Show all datasets with full titles in the message
-        dataset_list = []
-        for i, dataset in enumerate(datasets, 1):
-            title = clean_text_for_markdown(dataset.title) if dataset.title else "Sin título"
-            # Don't truncate - show full title with bold formatting
-            dataset_list.append(f"{i}. *{title}*")
+        # Show all datasets with full titles (not truncated) in bold
+        dataset_list = "\n\n".join(
+            f"{num}*{dataset.title_md}*"
+            for num, dataset in zip(_LIST_NUMBERS, datasets)
+        )
         
         clean_theme_name = clean_text_for_markdown(theme_name)
         
@@ -545,7 +516,7 @@ async def show_datasets(query, context, theme_name: str, page: int = 0) -> None:
             f"📋 *{clean_theme_name}*\n\n"
             f"📊 Total: {real_total_count} datasets\n"
             f"📄 Página {page + 1} de {total_pages} ({len(datasets)} datasets)\n\n"
-            f"**Datasets disponibles:**\n" + "\n\n".join(dataset_list) + "\n\n"
+            f"**Datasets disponibles:**\n{dataset_list}\n\n"
             f"_Haz clic en el número correspondiente para ver detalles._"
         )
         
@@ -557,11 +528,8 @@ async def show_datasets(query, context, theme_name: str, page: int = 0) -> None:
         
     except Exception as e:
         logger.error(f"Error in show_datasets: {e}")
-        import traceback
         traceback.print_exc()
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("⬅️ Volver a categorías", callback_data="start")]
-        ])
+        keyboard = _BACK_TO_THEMES_KB
         await query.edit_message_text(
             f"❌ Error al cargar los datasets: {str(e)}",
             reply_markup=keyboard
@@ -582,13 +550,13 @@ async def show_dataset_info(query, context, dataset_id: str) -> None:
         
         # Check if dataset is bookmarked by user
         user_id = query.from_user.id
-        user_db_id = db_manager.get_or_create_user(telegram_id=user_id)  # Now returns ID directly
-        is_bookmarked = db_manager.is_bookmarked(user_db_id, dataset_id)
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user_id)  # Now returns ID directly
+        is_bookmarked = await _run_db(db_manager.is_bookmarked, user_db_id, dataset_id)
         
         keyboard = create_dataset_info_keyboard(dataset_id, exports, len(attachments) > 0, is_bookmarked, dataset.title)
         
         # Format dataset information with improved description formatting
-        description = format_description(dataset.description)
+        description = dataset.description_md
         
         themes_text = ", ".join(dataset.themes) if dataset.themes else "Dato no disponible"
         themes_text = clean_text_for_markdown(themes_text)
@@ -596,7 +564,7 @@ async def show_dataset_info(query, context, dataset_id: str) -> None:
             themes_text = themes_text[:200] + "..."
         
         # Limit title length to prevent message overflow  
-        title = clean_text_for_markdown(dataset.title) if dataset.title else "Sin título"
+        title = dataset.title_md
         if len(title) > 80:
             title = title[:80] + "..."
         
@@ -633,7 +601,6 @@ async def show_dataset_info(query, context, dataset_id: str) -> None:
         
     except Exception as e:
         logger.error(f"Error in show_dataset_info for dataset '{dataset_id}': {e}")
-        import traceback
         traceback.print_exc()
         await query.edit_message_text(
             f"❌ Error al cargar el dataset.\n\n"
@@ -685,7 +652,6 @@ async def handle_subscription(query, context) -> None:
         # Handle shortened callbacks
         if data.startswith("s:"):
             # Get original callback from mapper
-            from .keyboards import callback_mapper
             short_id = data.split(":", 1)[1]
             original_data = callback_mapper.get_full_data(short_id)
             if not original_data:
@@ -709,7 +675,7 @@ async def handle_subscription(query, context) -> None:
             return
         
         # Get user from database
-        user_db_id = db_manager.get_or_create_user(telegram_id=user.id)  # Now returns ID directly
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user.id)  # Now returns ID directly
         
         # Determine subscription name
         if sub_type == "theme":
@@ -720,18 +686,15 @@ async def handle_subscription(query, context) -> None:
         
         
         # Add subscription
-        success = db_manager.add_subscription(user_db_id, sub_type, sub_id, sub_name)
+        success = await _run_db(db_manager.add_subscription, user_db_id, sub_type, sub_id, sub_name)
         
         if success:
             type_text = "categoría" if sub_type == "theme" else "dataset"
             # Escape HTML characters in subscription name
-            safe_name = sub_name.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            safe_name = html.escape(sub_name, quote=False)
             
             # Add home button
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-            keyboard = InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 Inicio", callback_data="start")
-            ]])
+            keyboard = _HOME_KB
             
             await query.edit_message_text(
                 f"✅ Te has suscrito a la {type_text}: {sub_name}\n\n"
@@ -742,13 +705,10 @@ async def handle_subscription(query, context) -> None:
         else:
             type_text = "categoría" if sub_type == "theme" else "dataset"
             # Escape HTML characters in subscription name
-            safe_name = sub_name.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+            safe_name = html.escape(sub_name, quote=False)
             
             # Add home button
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-            keyboard = InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 Inicio", callback_data="start")
-            ]])
+            keyboard = _HOME_KB
             
             await query.edit_message_text(
                 f"ℹ️ Ya estás suscrito a la {type_text}: {sub_name}",
@@ -771,48 +731,50 @@ async def my_subscriptions_command(update: Update, context: ContextTypes.DEFAULT
     
     try:
         # Get user from database
-        user_db_id = db_manager.get_or_create_user(telegram_id=user.id)  # Now returns ID directly
-        subscriptions = db_manager.get_user_subscriptions(user_db_id)
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user.id)  # Now returns ID directly
+        subscriptions = await _run_db(db_manager.get_user_subscriptions, user_db_id)
         
         if not subscriptions:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-            ])
+            keyboard = _HOME_KB
             message = (
-                "📭 *Mis alertas*\n\n"
+                "📭 <b>Mis alertas</b>\n\n"
                 "No tienes suscripciones activas.\n\n"
                 "Usa el botón de abajo para explorar y suscribirte a categorías o datasets."
             )
             await update.message.reply_text(
                 message, 
-                parse_mode="Markdown",
+                parse_mode="HTML",
                 reply_markup=keyboard
             )
             return
         
-        # Format subscriptions for keyboard
-        sub_list = [(s.id, s.subscription_type, s.subscription_name, s.subscription_id) for s in subscriptions]
+        # Format subscriptions for keyboard and count types in a single pass
+        sub_list = []
+        counts = {"theme": 0, "dataset": 0, "keyword": 0}
+        for s in subscriptions:
+            sub_list.append((s.id, s.subscription_type, s.subscription_name, s.subscription_id))
+            counts[s.subscription_type] = counts.get(s.subscription_type, 0) + 1
         keyboard = create_subscriptions_keyboard(sub_list)
         
-        # Count different types of subscriptions
-        theme_count = sum(1 for s in subscriptions if s.subscription_type == "theme")
-        dataset_count = sum(1 for s in subscriptions if s.subscription_type == "dataset")
-        keyword_count = sum(1 for s in subscriptions if s.subscription_type == "keyword")
+        theme_count = counts["theme"]
+        dataset_count = counts["dataset"]
+        keyword_count = counts["keyword"]
         
-        message = f"🔔 *Mis alertas*\n\n"
-        message += f"Tienes {len(subscriptions)} suscripciones activas:\n"
+        parts = [f"🔔 <b>Mis alertas</b>\n\n"]
+        parts.append(f"Tienes {len(subscriptions)} suscripciones activas:\n")
         if theme_count > 0:
-            message += f"📂 {theme_count} categorías\n"
+            parts.append(f"📂 {theme_count} categorías\n")
         if dataset_count > 0:
-            message += f"📄 {dataset_count} datasets\n"
+            parts.append(f"📄 {dataset_count} datasets\n")
         if keyword_count > 0:
-            message += f"🔍 {keyword_count} palabras clave\n"
-        message += f"\nRecibirás alertas cuando haya cambios cada 2 horas.\n\n"
-        message += f"Toca una para cancelarla:"
+            parts.append(f"🔍 {keyword_count} palabras clave\n")
+        parts.append(f"\nRecibirás alertas cuando haya cambios cada 2 horas.\n\n")
+        parts.append(f"Toca una para cancelarla:")
+        message = "".join(parts)
         
         await update.message.reply_text(
             message,
-            parse_mode="Markdown",
+            parse_mode="HTML",
             reply_markup=keyboard
         )
         
@@ -829,13 +791,11 @@ async def show_my_subscriptions(query, context) -> None:
     
     try:
         # Get user from database
-        user_db_id = db_manager.get_or_create_user(telegram_id=user.id)  # Now returns ID directly
-        subscriptions = db_manager.get_user_subscriptions(user_db_id)
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user.id)  # Now returns ID directly
+        subscriptions = await _run_db(db_manager.get_user_subscriptions, user_db_id)
         
         if not subscriptions:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-            ])
+            keyboard = _HOME_KB
             await query.edit_message_text(
                 "📭 No tienes suscripciones activas.\n\n"
                 "Usa el botón de abajo para explorar y suscribirte.",
@@ -872,14 +832,8 @@ async def confirm_unsubscribe(query, context, sub_id: int) -> None:
     
     try:
         # Get user and subscription details
-        user_db_id = db_manager.get_or_create_user(telegram_id=user.id)  # Now returns ID directly
-        subscriptions = db_manager.get_user_subscriptions(user_db_id)
-        
-        subscription = None
-        for sub in subscriptions:
-            if sub.id == sub_id:
-                subscription = sub
-                break
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user.id)  # Now returns ID directly
+        subscription = await _run_db(db_manager.get_subscription_by_id, user_db_id, sub_id)
         
         if not subscription:
             await query.edit_message_text("❌ Suscripción no encontrada.")
@@ -913,25 +867,19 @@ async def handle_unsubscribe(query, context, sub_id: int) -> None:
     
     try:
         # Get user from database
-        user_db_id = db_manager.get_or_create_user(telegram_id=user.id)  # Now returns ID directly
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user.id)  # Now returns ID directly
         
-        success = db_manager.remove_subscription(user_db_id, sub_id)
+        success = await _run_db(db_manager.remove_subscription, user_db_id, sub_id)
         
         if success:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔔 Mis alertas", callback_data="mis_alertas")],
-                [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-            ])
+            keyboard = _HOME_AND_ALERTS_KB
             await query.edit_message_text(
                 "✅ Suscripción cancelada correctamente.\n\n"
                 "Puedes gestionar tus otras suscripciones desde 'Mis alertas'.",
                 reply_markup=keyboard
             )
         else:
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔔 Mis alertas", callback_data="mis_alertas")],
-                [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-            ])
+            keyboard = _HOME_AND_ALERTS_KB
             await query.edit_message_text(
                 "❌ Error al cancelar la suscripción.",
                 reply_markup=keyboard
@@ -939,16 +887,97 @@ async def handle_unsubscribe(query, context, sub_id: int) -> None:
         
     except Exception as e:
         logger.error(f"Error in handle_unsubscribe: {e}")
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔔 Mis alertas", callback_data="mis_alertas")],
-            [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-        ])
+        keyboard = _HOME_AND_ALERTS_KB
         await query.edit_message_text(
             "❌ Error al procesar la cancelación.",
             reply_markup=keyboard
         )
 
 
+async def _get_top_theme_counts(themes, force: bool = False) -> list:
+    """Return the five largest (theme, count) pairs, querying themes concurrently."""
+    cached = _stats_cache.get("theme_counts")
+    if cached and not force and time.monotonic() - cached[0] < _STATS_CACHE_TTL:
+        return cached[1]
+    
+    sample = themes[:10]  # Check top 10 themes
+    results = await asyncio.gather(
+        *(api_client.get_datasets(theme=theme.name, limit=1) for theme in sample),
+        return_exceptions=True
+    )
+    
+    theme_counts = []
+    for theme, result in zip(sample, results):
+        if isinstance(result, BaseException):
+            continue
+        count = result[1] or theme.count
+        if count:
+            theme_counts.append((theme.name, count))
+    
+    theme_counts.sort(key=lambda x: x[1], reverse=True)
+    top_themes = theme_counts[:5]
+    _stats_cache["theme_counts"] = (time.monotonic(), top_themes)
+    return top_themes
+
+
+async def _build_stats_message(force: bool = False) -> tuple[str, InlineKeyboardMarkup]:
+    """Build the portal statistics message, reusing a recent result unless forced."""
+    cached = _stats_cache.get("portal_stats")
+    if cached and not force and time.monotonic() - cached[0] < _STATS_CACHE_TTL:
+        return cached[1]
+    
+    async def themes_with_top_counts():
+        # Per-theme counts need the theme list, so chain them in one task
+        themes = await api_client.get_themes()
+        return themes, await _get_top_theme_counts(themes, force=force)
+    
+    # Portal API calls and the DB counts are independent; run them concurrently
+    cutoff = (date.today() - timedelta(days=30)).isoformat()
+    (
+        (themes, top_themes),
+        (sample_datasets, total_datasets_estimate),
+        (_, recent_count),
+        (total_users, active_subs),
+    ) = await asyncio.gather(
+        themes_with_top_counts(),
+        api_client.get_datasets(limit=1),
+        # Datasets with data updated in last 30 days, filtered server-side
+        api_client.get_datasets(limit=0, where=f"data_processed >= date'{cutoff}'"),
+        _run_db(db_manager.get_bot_stats)
+    )
+    total_themes = len(themes)
+    
+    if total_datasets_estimate == 0:
+        # Fallback calculation
+        total_datasets_estimate = len(sample_datasets) * 10  # Conservative estimate
+    
+    logger.info(f"Found {recent_count} datasets updated in last 30 days")
+    
+    # Build statistics message
+    parts = ["📊 <b>Estadísticas del Portal de Datos Abiertos CyL</b>\n\n"]
+    
+    parts.append(f"📈 <b>Datos Generales</b>\n")
+    parts.append(f"• Total datasets: <b>~{total_datasets_estimate:,}</b>\n")
+    parts.append(f"• Categorías disponibles: <b>{total_themes}</b>\n\n")
+    
+    parts.append(f"🔥 <b>Categorías más populares</b>\n")
+    for i, (theme_name, count) in enumerate(top_themes, 1):
+        emoji = ["🥇", "🥈", "🥉", "🏅", "🏅"][i-1]
+        parts.append(f"{emoji} <b>{html.escape(theme_name, quote=False)}</b>: {count} datasets\n")
+    
+    if active_subs > 0:
+        parts.append(f"\n🤖 <b>Estadísticas del Bot</b>\n")
+        parts.append(f"• Usuarios registrados: <b>{total_users}</b>\n")
+        parts.append(f"• Suscripciones activas: <b>{active_subs}</b>\n")
+    
+    parts.append(f"\n📅 Actualizado: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+    stats_message = "".join(parts)
+    
+    result = (stats_message, _REFRESH_STATS_KB)
+    _stats_cache["portal_stats"] = (time.monotonic(), result)
+    return result
+
+
 async def portal_stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /estadisticas command."""
     user = update.effective_user
@@ -958,229 +987,39 @@ async def portal_stats_command(update: Update, context: ContextTypes.DEFAULT_TYP
     loading_message = await update.message.reply_text("📊 Obteniendo estadísticas del portal...")
 
     try:
-        # Get basic portal statistics
-        themes = await api_client.get_themes()
-        total_themes = len(themes)
-        
-        # Get total datasets count and recent activity
-        recent_datasets, total_datasets_estimate = await api_client.get_datasets(limit=100, offset=0)
-        
-        if total_datasets_estimate == 0:
-            # Fallback calculation
-            total_datasets_estimate = len(recent_datasets) * 10  # Conservative estimate
-        
-        # Calculate recent activity (last 30 days)
-        cutoff_date = datetime.now() - timedelta(days=30)
-        recent_count = 0
-        
-        # Count datasets with data updated in last 30 days
-        sample_dates = []
-        for i, dataset in enumerate(recent_datasets):
-            if dataset.data_processed and dataset.data_processed != "Dato no disponible":
-                # Collect first 3 dates as samples for debugging
-                if len(sample_dates) < 3:
-                    sample_dates.append(dataset.data_processed)
-                try:
-                    modified_date = None
-                    date_str = dataset.data_processed.strip()
-                    
-                    # Try different date formats
-                    formats = [
-                        "%d/%m/%Y",         # 01/12/2024
-                        "%Y-%m-%d",         # 2024-12-01
-                        "%Y-%m-%dT%H:%M:%S", # 2024-12-01T10:30:45
-                        "%Y-%m-%dT%H:%M:%SZ", # 2024-12-01T10:30:45Z
-                        "%Y-%m-%d %H:%M:%S", # 2024-12-01 10:30:45
-                    ]
-                    
-                    for fmt in formats:
-                        try:
-                            if "T" in date_str and "Z" in date_str:
-                                modified_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                            else:
-                                modified_date = datetime.strptime(date_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    
-                    if modified_date and modified_date >= cutoff_date:
-                        recent_count += 1
-                        
-                except Exception as e:
-                    # Debug: log some failed dates to understand the format
-                    logger.debug(f"Failed to parse date: {dataset.data_processed}")
-                    continue
-        
-        # Log sample dates for debugging
-        logger.info(f"Sample modification dates found: {sample_dates[:3]}")
-        logger.info(f"Found {recent_count} datasets updated in last 30 days")
-        
-        # Get most active themes (top 5)
-        theme_counts = []
-        for theme in themes[:10]:  # Check top 10 themes
-            try:
-                theme_datasets, theme_count = await api_client.get_datasets(theme=theme.name, limit=1)
-                count = theme_count or theme.count
-                if count:
-                    theme_counts.append((theme.name, count))
-            except:
-                continue
-        
-        theme_counts.sort(key=lambda x: x[1], reverse=True)
-        top_themes = theme_counts[:5]
-        
-        # Get user subscription stats
-        session = db_manager.get_session()
-        try:
-            from ..models import Subscription, User
-            total_users = session.query(User).count()
-            active_subs = session.query(Subscription).filter(Subscription.is_active == True).count()
-        finally:
-            session.close()
-        
-        # Build statistics message
-        stats_message = "📊 **Estadísticas del Portal de Datos Abiertos CyL**\n\n"
-        
-        stats_message += f"📈 **Datos Generales**\n"
-        stats_message += f"• Total datasets: **~{total_datasets_estimate:,}**\n"
-        stats_message += f"• Categorías disponibles: **{total_themes}**\n\n"
-        
-        stats_message += f"🔥 **Categorías más populares**\n"
-        for i, (theme_name, count) in enumerate(top_themes, 1):
-            emoji = ["🥇", "🥈", "🥉", "🏅", "🏅"][i-1]
-            stats_message += f"{emoji} **{theme_name}**: {count} datasets\n"
-        
-        if active_subs > 0:
-            stats_message += f"\n🤖 **Estadísticas del Bot**\n"
-            stats_message += f"• Usuarios registrados: **{total_users}**\n"
-            stats_message += f"• Suscripciones activas: **{active_subs}**\n"
-        
-        stats_message += f"\n📅 Actualizado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-        
-        # Create keyboard
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_stats")],
-            [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-        ])
-        
-        await loading_message.edit_text(stats_message, reply_markup=keyboard, parse_mode='Markdown')
+        stats_message, keyboard = await _build_stats_message()
+        await loading_message.edit_text(stats_message, reply_markup=keyboard, parse_mode='HTML', disable_web_page_preview=True)
         
     except Exception as e:
         logger.error(f"Error getting portal stats: {e}")
         await loading_message.edit_text(
             "❌ Error al obtener las estadísticas.\n\n"
             "Inténtalo de nuevo más tarde.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 Inicio", callback_data="start")
-            ]])
+            reply_markup=_HOME_KB
         )
 
 
 async def refresh_portal_stats(query, context) -> None:
     """Refresh portal statistics via callback."""
-    await query.edit_message_text("📊 Actualizando estadísticas...")
+    # Ignore repeated taps while this user's refresh is still running
+    user_id = query.from_user.id
+    if user_id in _refreshing_stats_users:
+        return
+    _refreshing_stats_users.add(user_id)
     
     try:
-        # Get updated statistics (same logic as portal_stats_command)
-        themes = await api_client.get_themes()
-        total_themes = len(themes)
-        
-        recent_datasets, total_datasets_estimate = await api_client.get_datasets(limit=100, offset=0)
-        if total_datasets_estimate == 0:
-            total_datasets_estimate = len(recent_datasets) * 10
-        
-        # Calculate recent activity
-        cutoff_date = datetime.now() - timedelta(days=30)
-        recent_count = 0
-        
-        for dataset in recent_datasets:
-            if dataset.data_processed and dataset.data_processed != "Dato no disponible":
-                try:
-                    modified_date = None
-                    date_str = dataset.data_processed.strip()
-                    
-                    # Try different date formats
-                    formats = [
-                        "%d/%m/%Y",         # 01/12/2024
-                        "%Y-%m-%d",         # 2024-12-01
-                        "%Y-%m-%dT%H:%M:%S", # 2024-12-01T10:30:45
-                        "%Y-%m-%dT%H:%M:%SZ", # 2024-12-01T10:30:45Z
-                        "%Y-%m-%d %H:%M:%S", # 2024-12-01 10:30:45
-                    ]
-                    
-                    for fmt in formats:
-                        try:
-                            if "T" in date_str and "Z" in date_str:
-                                modified_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                            else:
-                                modified_date = datetime.strptime(date_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    
-                    if modified_date and modified_date >= cutoff_date:
-                        recent_count += 1
-                        
-                except Exception as e:
-                    logger.debug(f"Failed to parse date: {dataset.data_processed}")
-                    continue
-        
-        # Get theme counts
-        theme_counts = []
-        for theme in themes[:10]:
-            try:
-                theme_datasets, theme_count = await api_client.get_datasets(theme=theme.name, limit=1)
-                count = theme_count or theme.count
-                if count:
-                    theme_counts.append((theme.name, count))
-            except:
-                continue
-        
-        theme_counts.sort(key=lambda x: x[1], reverse=True)
-        top_themes = theme_counts[:5]
-        
-        # Get subscription stats
-        session = db_manager.get_session()
-        try:
-            from ..models import Subscription, User
-            total_users = session.query(User).count()
-            active_subs = session.query(Subscription).filter(Subscription.is_active == True).count()
-        finally:
-            session.close()
-        
-        # Build message
-        stats_message = "📊 **Estadísticas del Portal de Datos Abiertos CyL**\n\n"
-        stats_message += f"📈 **Datos Generales**\n"
-        stats_message += f"• Total datasets: **~{total_datasets_estimate:,}**\n"
-        stats_message += f"• Categorías disponibles: **{total_themes}**\n\n"
-        
-        stats_message += f"🔥 **Categorías más populares**\n"
-        for i, (theme_name, count) in enumerate(top_themes, 1):
-            emoji = ["🥇", "🥈", "🥉", "🏅", "🏅"][i-1]
-            stats_message += f"{emoji} **{theme_name}**: {count} datasets\n"
-        
-        if active_subs > 0:
-            stats_message += f"\n🤖 **Estadísticas del Bot**\n"
-            stats_message += f"• Usuarios registrados: **{total_users}**\n"
-            stats_message += f"• Suscripciones activas: **{active_subs}**\n"
-        
-        stats_message += f"\n📅 Actualizado: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-        
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_stats")],
-            [InlineKeyboardButton("🏠 Inicio", callback_data="start")]
-        ])
-        
-        await query.edit_message_text(stats_message, reply_markup=keyboard, parse_mode='Markdown')
+        await query.edit_message_text("📊 Actualizando estadísticas...")
+        stats_message, keyboard = await _build_stats_message(force=True)
+        await query.edit_message_text(stats_message, reply_markup=keyboard, parse_mode='HTML', disable_web_page_preview=True)
         
     except Exception as e:
         logger.error(f"Error refreshing stats: {e}")
         await query.edit_message_text(
             "❌ Error al actualizar las estadísticas.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 Inicio", callback_data="start")
-            ]])
+            reply_markup=_HOME_KB
         )
+    finally:
+        _refreshing_stats_users.discard(user_id)
 
 
 async def keyword_alerts_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1191,81 +1030,56 @@ async def keyword_alerts_command(update: Update, context: ContextTypes.DEFAULT_T
 
     if not context.args:
         # Show help and current keyword alerts
-        user_db_id = db_manager.get_or_create_user(telegram_id=user.id)
+        user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user.id)
         
         # Get existing keyword subscriptions
-        session = db_manager.get_session()
-        try:
-            from ..models import Subscription
-            keyword_subs = session.query(Subscription).filter(
-                Subscription.user_id == user_db_id,
-                Subscription.subscription_type == "keyword",
-                Subscription.is_active == True
-            ).all()
-        finally:
-            session.close()
-        
-        message = "🔍 **Alertas por Palabras Clave**\n\n"
-        message += "Recibe notificaciones cuando aparezcan nuevos datasets que contengan palabras específicas.\n\n"
+        keyword_subs = await _run_db(db_manager.get_user_subscriptions, user_db_id, "keyword")
+        
+        parts = ["🔍 **Alertas por Palabras Clave**\n\n"]
+        parts.append("Recibe notificaciones cuando aparezcan nuevos datasets que contengan palabras específicas.\n\n")
         
         if keyword_subs:
-            message += "🔔 **Tus alertas activas:**\n"
+            parts.append("🔔 **Tus alertas activas:**\n")
             for sub in keyword_subs:
-                message += f"• {sub.subscription_id}\n"
-            message += "\n"
+                parts.append(f"• {sub.subscription_id}\n")
+            parts.append("\n")
         
-        message += "**Uso:**\n"
-        message += "`/alertas_palabras [palabra]` - Añadir alerta\n"
-        message += "`/alertas_palabras quitar [palabra]` - Quitar alerta\n\n"
-        message += "**Ejemplos:**\n"
-        message += "`/alertas_palabras transporte`\n"
-        message += "`/alertas_palabras educación`\n"
-        message += "`/alertas_palabras quitar transporte`"
+        parts.append("**Uso:**\n")
+        parts.append("`/alertas_palabras [palabra]` - Añadir alerta\n")
+        parts.append("`/alertas_palabras quitar [palabra]` - Quitar alerta\n\n")
+        parts.append("**Ejemplos:**\n")
+        parts.append("`/alertas_palabras transporte`\n")
+        parts.append("`/alertas_palabras educación`\n")
+        parts.append("`/alertas_palabras quitar transporte`")
+        message = "".join(parts)
         
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("🏠 Inicio", callback_data="start")
-        ]])
+        keyboard = _HOME_KB
         
         await update.message.reply_text(message, reply_markup=keyboard)
         return
     
     # Process the command
     args = context.args
-    user_db_id = db_manager.get_or_create_user(telegram_id=user.id)
+    user_db_id = await _run_db(db_manager.get_or_create_user, telegram_id=user.id)
     
     if args[0].lower() == "quitar" and len(args) > 1:
         # Remove keyword alert
         keyword = " ".join(args[1:]).lower().strip()
         
-        session = db_manager.get_session()
-        try:
-            from ..models import Subscription
-            existing = session.query(Subscription).filter(
-                Subscription.user_id == user_db_id,
-                Subscription.subscription_type == "keyword",
-                Subscription.subscription_id == keyword,
-                Subscription.is_active == True
-            ).first()
+        removed = await _run_db(db_manager.deactivate_keyword_subscription, user_db_id, keyword)
+        
+        if removed:
+            keyboard = _HOME_KB
             
-            if existing:
-                existing.is_active = False
-                session.commit()
-                
-                keyboard = InlineKeyboardMarkup([[
-                    InlineKeyboardButton("🏠 Inicio", callback_data="start")
-                ]])
-                
-                await update.message.reply_text(
-                    f"✅ Alerta eliminada para: {keyword}\n\n"
-                    f"Ya no recibirás notificaciones de datasets con esta palabra.",
-                    reply_markup=keyboard
-                )
-            else:
-                await update.message.reply_text(
-                    f"❌ No tienes alertas activas para: {keyword}"
-                )
-        finally:
-            session.close()
+            await update.message.reply_text(
+                f"✅ Alerta eliminada para: {keyword}\n\n"
+                f"Ya no recibirás notificaciones de datasets con esta palabra.",
+                reply_markup=keyboard
+            )
+        else:
+            await update.message.reply_text(
+                f"❌ No tienes alertas activas para: {keyword}"
+            )
     else:
         # Add keyword alert
         keyword = " ".join(args).lower().strip()
@@ -1276,11 +1090,11 @@ async def keyword_alerts_command(update: Update, context: ContextTypes.DEFAULT_T
             )
             return
         
-        success = db_manager.add_subscription(user_db_id, "keyword", keyword, f"Palabra clave: {keyword}")
+        success = await _run_db(
+            db_manager.add_subscription, user_db_id, "keyword", keyword, f"Palabra clave: {keyword}"
+        )
         
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("🏠 Inicio", callback_data="start")
-        ]])
+        keyboard = _HOME_KB
         
         if success:
             await update.message.reply_text(
@@ -1296,102 +1110,112 @@ async def keyword_alerts_command(update: Update, context: ContextTypes.DEFAULT_T
             )
 
 
+async def _build_admin_users_page(page: int) -> tuple[str, Optional[InlineKeyboardMarkup]]:
+    """Build one page of the admin user list with its navigation keyboard."""
+    offset = page * ADMIN_USERS_PER_PAGE
+    users_page, total_users = await asyncio.gather(
+        # Fetch one extra row to know whether there is a next page
+        _run_db(db_manager.get_users_with_subscription_counts, ADMIN_USERS_PER_PAGE + 1, offset),
+        _run_db(db_manager.count_users)
+    )
+    if not total_users:
+        return "📭 No hay usuarios registrados.", None
+    
+    has_next = len(users_page) > ADMIN_USERS_PER_PAGE
+    users_page = users_page[:ADMIN_USERS_PER_PAGE]
+    
+    parts = ["👥 <b>Lista de Usuarios del Bot</b>\n\n"]
+    
+    for telegram_id, username, first_name, last_name, created_at, sub_count in users_page:
+        # Build display name
+        name_parts = []
+        if first_name:
+            name_parts.append(first_name)
+        if last_name:
+            name_parts.append(last_name)
+        display_name = " ".join(name_parts) if name_parts else "Sin nombre"
+        
+        username_text = f"@{username}" if username else "Sin username"
+        
+        parts.append(
+            f"• <b>{html.escape(display_name, quote=False)}</b>\n"
+            f"  └ {html.escape(username_text, quote=False)}\n"
+            f"  └ ID: <code>{telegram_id}</code>\n"
+            f"  └ Suscripciones: {sub_count}\n"
+            f"  └ Registrado: {created_at.strftime('%d/%m/%Y')}\n\n"
+        )
+    
+    total_pages = max(1, (total_users + ADMIN_USERS_PER_PAGE - 1) // ADMIN_USERS_PER_PAGE)
+    parts.append(f"📊 <b>Total: {total_users} usuarios</b> (página {page + 1}/{total_pages})")
+    
+    nav_row = []
+    if page > 0:
+        nav_row.append(InlineKeyboardButton("⬅️ Anterior", callback_data=f"admin_users:{page - 1}"))
+    if has_next:
+        nav_row.append(InlineKeyboardButton("Siguiente ➡️", callback_data=f"admin_users:{page + 1}"))
+    keyboard = InlineKeyboardMarkup([nav_row]) if nav_row else None
+    
+    return "".join(parts), keyboard
+
+
 async def admin_users_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /admin_users command - Only for admins."""
     user = update.effective_user
     if not user:
         return
 
-    # Lista de IDs de administradores (configurable)
-    ADMIN_TELEGRAM_IDS = [
-        # Añade tu Telegram ID aquí
-        # 123456789,  # Tu ID de Telegram
-    ]
-    
     if user.id not in ADMIN_TELEGRAM_IDS:
         await update.message.reply_text("❌ No tienes permisos de administrador.")
         return
     
+    # Optional 1-based page number: /admin_users 2
+    page = 0
+    if context.args and context.args[0].isdigit():
+        page = max(int(context.args[0]) - 1, 0)
+    
     try:
-        # Get all users from database
-        session = db_manager.get_session()
-        try:
-            from ..models import User, Subscription
-            
-            # Get users with subscription counts
-            users_query = session.query(
-                User.telegram_id,
-                User.username, 
-                User.first_name, 
-                User.last_name,
-                User.created_at
-            ).all()
-            
-            if not users_query:
-                await update.message.reply_text("📭 No hay usuarios registrados.")
-                return
-            
-            # Build user list message
-            message = "👥 **Lista de Usuarios del Bot**\n\n"
-            
-            for user_data in users_query:
-                telegram_id, username, first_name, last_name, created_at = user_data
-                
-                # Build display name
-                name_parts = []
-                if first_name:
-                    name_parts.append(first_name)
-                if last_name:
-                    name_parts.append(last_name)
-                display_name = " ".join(name_parts) if name_parts else "Sin nombre"
-                
-                username_text = f"@{username}" if username else "Sin username"
-                
-                # Get subscription count for this user
-                user_db = session.query(User).filter_by(telegram_id=telegram_id).first()
-                if user_db:
-                    sub_count = session.query(Subscription).filter(
-                        Subscription.user_id == user_db.id,
-                        Subscription.is_active == True
-                    ).count()
-                else:
-                    sub_count = 0
-                
-                message += f"• **{display_name}**\n"
-                message += f"  └ {username_text}\n"
-                message += f"  └ ID: `{telegram_id}`\n"
-                message += f"  └ Suscripciones: {sub_count}\n"
-                message += f"  └ Registrado: {created_at.strftime('%d/%m/%Y')}\n\n"
-            
-            total_users = len(users_query)
-            message += f"📊 **Total: {total_users} usuarios**"
-            
-            # Send message (split if too long)
-            if len(message) > 4000:
-                # Split message
-                parts = message.split('\n\n')
-                current_message = "👥 **Lista de Usuarios del Bot**\n\n"
-                
-                for part in parts[1:-1]:  # Skip header and footer
-                    if len(current_message + part) > 3800:
-                        await update.message.reply_text(current_message, parse_mode="Markdown")
-                        current_message = ""
-                    current_message += part + "\n\n"
-                
-                # Send remaining + footer
-                current_message += parts[-1]
-                await update.message.reply_text(current_message, parse_mode="Markdown")
-            else:
-                await update.message.reply_text(message, parse_mode="Markdown")
-                
-        finally:
-            session.close()
+        message, keyboard = await _build_admin_users_page(page)
+        await update.message.reply_text(message, parse_mode="HTML", reply_markup=keyboard)
             
     except Exception as e:
         logger.error(f"Error in admin_users_command: {e}")
         await update.message.reply_text("❌ Error al obtener la lista de usuarios.")
 
 
+async def show_admin_users_page(query, context, page: int) -> None:
+    """Show another page of the admin user list (callback version)."""
+    if query.from_user.id not in ADMIN_TELEGRAM_IDS:
+        await query.edit_message_text("❌ No tienes permisos de administrador.")
+        return
+    
+    try:
+        message, keyboard = await _build_admin_users_page(page)
+        await query.edit_message_text(message, parse_mode="HTML", reply_markup=keyboard)
+        
+    except Exception as e:
+        logger.error(f"Error in show_admin_users_page: {e}")
+        await query.edit_message_text("❌ Error al obtener la lista de usuarios.")
+
+
+def _render_search(datasets, search_term: str, page: int, total_count: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Build a page of search results and its numbered keyboard."""
+    per_page = settings.datasets_per_page
+    keyboard = create_search_results_keyboard(datasets, search_term, page, per_page, total_count)
+    
+    # Show all search results with full titles
+    search_results = "\n\n".join(f"{num}{dataset.title_md}" for num, dataset in zip(_LIST_NUMBERS, datasets))
+    total_pages = (total_count + per_page - 1) // per_page
+    
+    message = (
+        f"🔍 <b>Resultados: '{clean_text_for_markdown(search_term)}'</b>\n\n"
+        f"📊 <b>Total:</b> {total_count} datasets encontrados\n"
+        f"📄 <b>Página:</b> {page + 1} de {total_pages} ({len(datasets)} datasets)\n\n"
+        f"<b>Datasets encontrados:</b>\n{search_results}\n\n"
+        f"💡 <i>Haz clic en el número para ver detalles del dataset.</i>"
+    )
+    return message, keyboard
+
+
 async def search_datasets(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle search functionality."""
     if not context.args:
@@ -1428,29 +1252,13 @@ async def search_datasets(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             )
             return
         
-        keyboard = create_search_results_keyboard(datasets, search_term, 0, settings.datasets_per_page, total_count)
-        
-        # Show all search results with full titles
-        search_results = []
-        for i, dataset in enumerate(datasets, 1):
-            title = clean_text_for_markdown(dataset.title) if dataset.title else "Sin título"
-            # Don't truncate - show full title
-            search_results.append(f"{i}. {title}")
-        
-        clean_search_term = clean_text_for_markdown(search_term)
-        
-        message = (
-            f"🔍 <b>Resultados: '{clean_search_term}'</b>\n\n"
-            f"📊 <b>Total:</b> {total_count} datasets encontrados\n"
-            f"📄 <b>Página:</b> 1 de {(total_count + settings.datasets_per_page - 1) // settings.datasets_per_page} ({len(datasets)} datasets)\n\n"
-            f"<b>Datasets encontrados:</b>\n" + "\n\n".join(search_results) + "\n\n"
-            f"💡 <i>Haz clic en el número correspondiente para ver detalles.</i>"
-        )
+        message, keyboard = _render_search(datasets, search_term, 0, total_count)
         
         await update.message.reply_text(
             message,
             parse_mode="HTML",
-            reply_markup=keyboard
+            reply_markup=keyboard,
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1458,6 +1266,33 @@ async def search_datasets(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         await update.message.reply_text("❌ Error al realizar la búsqueda. Inténtalo más tarde.")
 
 
+@lru_cache(maxsize=64)
+def _recent_message(entries: tuple, total_count: int) -> str:
+    """Format the recent datasets message from (title_md, metadata_processed) pairs."""
+    # Show modification date if available
+    recent_list = [
+        f"{num}*{title}*\n   _Actualizado: {format_user_friendly_date(processed)}_"
+        if processed and processed != "Dato no disponible"
+        else f"{num}*{title}*"
+        for num, (title, processed) in zip(_LIST_NUMBERS, entries)
+    ]
+    
+    return (
+        f"🕒 *Datasets Actualizados Recientemente*\n\n"
+        f"📊 Total disponible: {total_count} datasets\n"
+        f"📄 Mostrando los {len(entries)} más recientes\n\n"
+        f"**Últimas actualizaciones:**\n\n" + "\n\n".join(recent_list) + "\n\n"
+        f"_Haz clic en el número para ver detalles._"
+    )
+
+
+def _render_recent(datasets, total_count: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Build the recent datasets message and its numbered keyboard."""
+    entries = tuple((dataset.title_md, dataset.metadata_processed) for dataset in datasets)
+    keyboard = create_recent_datasets_keyboard(datasets, 0, settings.datasets_per_page)
+    return _recent_message(entries, total_count), keyboard
+
+
 async def recent_datasets(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show recently updated datasets with numbered interface."""
     try:
@@ -1472,31 +1307,13 @@ async def recent_datasets(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await update.message.reply_text("❌ No se pudieron cargar los datasets recientes.")
             return
         
-        keyboard = create_recent_datasets_keyboard(datasets, 0, settings.datasets_per_page)
-        
-        # Show all recent datasets with full titles numbered
-        recent_list = []
-        for i, dataset in enumerate(datasets, 1):
-            title = clean_text_for_markdown(dataset.title) if dataset.title else "Sin título"
-            # Show modification date if available
-            if dataset.metadata_processed and dataset.metadata_processed != "Dato no disponible":
-                friendly_date = format_user_friendly_date(dataset.metadata_processed)
-                recent_list.append(f"{i}. *{title}*\n   _Actualizado: {friendly_date}_")
-            else:
-                recent_list.append(f"{i}. *{title}*")
-        
-        message = (
-            f"🕒 *Datasets Actualizados Recientemente*\n\n"
-            f"📊 Total disponible: {total_count} datasets\n"
-            f"📄 Mostrando los {len(datasets)} más recientes\n\n"
-            f"**Últimas actualizaciones:**\n\n" + "\n\n".join(recent_list) + "\n\n"
-            f"_Haz clic en el número para ver detalles._"
-        )
+        message, keyboard = _render_recent(datasets, total_count)
         
         await update.message.reply_text(
             message,
             parse_mode="Markdown",
-            reply_markup=keyboard
+            reply_markup=keyboard,
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1518,31 +1335,13 @@ async def handle_recent_datasets_callback(query, context) -> None:
             await query.edit_message_text("❌ No se pudieron cargar los datasets recientes.")
             return
         
-        keyboard = create_recent_datasets_keyboard(datasets, 0, settings.datasets_per_page)
-        
-        # Show all recent datasets with full titles numbered
-        recent_list = []
-        for i, dataset in enumerate(datasets, 1):
-            title = clean_text_for_markdown(dataset.title) if dataset.title else "Sin título"
-            # Show modification date if available
-            if dataset.metadata_processed and dataset.metadata_processed != "Dato no disponible":
-                friendly_date = format_user_friendly_date(dataset.metadata_processed)
-                recent_list.append(f"{i}. *{title}*\n   _Actualizado: {friendly_date}_")
-            else:
-                recent_list.append(f"{i}. *{title}*")
-        
-        message = (
-            f"🕒 *Datasets Actualizados Recientemente*\n\n"
-            f"📊 Total disponible: {total_count} datasets\n"
-            f"📄 Mostrando los {len(datasets)} más recientes\n\n"
-            f"**Últimas actualizaciones:**\n\n" + "\n\n".join(recent_list) + "\n\n"
-            f"_Haz clic en el número para ver detalles._"
-        )
+        message, keyboard = _render_recent(datasets, total_count)
         
         await query.edit_message_text(
             message,
             parse_mode="Markdown",
-            reply_markup=keyboard
+            reply_markup=keyboard,
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1553,40 +1352,36 @@ async def handle_recent_datasets_callback(query, context) -> None:
 async def handle_stats_callback(query, context) -> None:
     """Handle stats callback."""
     try:
-        # Get themes with counts
-        themes = await api_client.get_themes_with_real_counts()
+        # Get themes with counts and the total datasets count concurrently
+        # (both are served from the shared client's TTL cache when warm)
+        themes, (_, total_datasets) = await asyncio.gather(
+            api_client.get_themes_with_real_counts(),
+            api_client.get_datasets(limit=1)
+        )
         
         if not themes:
             await query.edit_message_text("❌ No se pudieron cargar las estadísticas.")
             return
         
-        # Get total datasets count
-        _, total_datasets = await api_client.get_datasets(limit=1)
-        
         # Top themes
-        top_themes = sorted(themes, key=lambda x: x.count, reverse=True)[:5]
+        top_themes = nlargest(5, themes, key=attrgetter('count'))
         
+        theme_lines = "".join(
+            f"{i}. {theme.name}: {theme.count} datasets\n" for i, theme in enumerate(top_themes, 1)
+        )
         message = (
             f"📈 <b>Estadísticas de Datos Abiertos</b>\n\n"
             f"📊 <b>Total de datasets:</b> {total_datasets}\n"
             f"🏷️ <b>Categorías disponibles:</b> {len(themes)}\n\n"
             f"🔝 <b>Top 5 Categorías:</b>\n"
+            f"{theme_lines}"
         )
         
-        for i, theme in enumerate(top_themes, 1):
-            message += f"{i}. {theme.name}: {theme.count} datasets\n"
-        
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("🔍 Buscar Datasets", callback_data="start_search"),
-            InlineKeyboardButton("🕒 Recientes", callback_data="recent_datasets")
-        ], [
-            InlineKeyboardButton("🏠 Inicio", callback_data="start")
-        ]])
-        
         await query.edit_message_text(
             message,
             parse_mode="HTML",
-            reply_markup=keyboard
+            reply_markup=_STATS_KB,
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1597,10 +1392,11 @@ async def handle_stats_callback(query, context) -> None:
 async def handle_search_page(query, context, search_term: str, page: int) -> None:
     """Handle search pagination."""
     try:
+        per_page = settings.datasets_per_page
         datasets, total_count = await api_client.get_datasets(
             search=search_term,
-            limit=settings.datasets_per_page,
-            offset=page * settings.datasets_per_page,
+            limit=per_page,
+            offset=page * per_page,
             order_by="-metadata_processed"  # Ensure consistent ordering
         )
         
@@ -1614,29 +1410,13 @@ async def handle_search_page(query, context, search_term: str, page: int) -> Non
                 )
             return
         
-        keyboard = create_search_results_keyboard(datasets, search_term, page, settings.datasets_per_page, total_count)
-        
-        # Show all search results with full titles
-        search_results = []
-        for i, dataset in enumerate(datasets, 1):
-            title = clean_text_for_markdown(dataset.title) if dataset.title else "Sin título"
-            # Don't truncate - show full title
-            search_results.append(f"{i}. {title}")
-        
-        clean_search_term = clean_text_for_markdown(search_term)
-        total_pages = (total_count + settings.datasets_per_page - 1) // settings.datasets_per_page
-        message = (
-            f"🔍 <b>Resultados: '{clean_search_term}'</b>\n\n"
-            f"📊 <b>Total:</b> {total_count} datasets encontrados\n"
-            f"📄 <b>Página:</b> {page + 1} de {total_pages} ({len(datasets)} datasets)\n\n"
-            f"<b>Datasets encontrados:</b>\n" + "\n\n".join(search_results) + "\n\n"
-            f"💡 <i>Haz clic en el número para ver detalles del dataset.</i>"
-        )
+        message, keyboard = _render_search(datasets, search_term, page, total_count)
         
         await query.edit_message_text(
             message,
             parse_mode="HTML",
-            reply_markup=keyboard
+            reply_markup=keyboard,
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1647,40 +1427,36 @@ async def handle_search_page(query, context, search_term: str, page: int) -> Non
 async def dataset_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show dataset statistics."""
     try:
-        # Get themes with counts
-        themes = await api_client.get_themes_with_real_counts()
+        # Get themes with counts and the total datasets count concurrently
+        # (both are served from the shared client's TTL cache when warm)
+        themes, (_, total_datasets) = await asyncio.gather(
+            api_client.get_themes_with_real_counts(),
+            api_client.get_datasets(limit=1)
+        )
         
         if not themes:
             await update.message.reply_text("❌ No se pudieron cargar las estadísticas.")
             return
         
-        # Get total datasets count
-        _, total_datasets = await api_client.get_datasets(limit=1)
-        
         # Top themes
-        top_themes = sorted(themes, key=lambda x: x.count, reverse=True)[:5]
+        top_themes = nlargest(5, themes, key=attrgetter('count'))
         
+        theme_lines = "".join(
+            f"{i}. {theme.name}: {theme.count} datasets\n" for i, theme in enumerate(top_themes, 1)
+        )
         message = (
             f"📈 <b>Estadísticas de Datos Abiertos</b>\n\n"
             f"📊 <b>Total de datasets:</b> {total_datasets}\n"
             f"🏷️ <b>Categorías disponibles:</b> {len(themes)}\n\n"
             f"🔝 <b>Top 5 Categorías:</b>\n"
+            f"{theme_lines}"
         )
         
-        for i, theme in enumerate(top_themes, 1):
-            message += f"{i}. {theme.name}: {theme.count} datasets\n"
-        
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("🔍 Buscar Datasets", callback_data="start_search"),
-            InlineKeyboardButton("🕒 Recientes", callback_data="recent_datasets")
-        ], [
-            InlineKeyboardButton("🏠 Inicio", callback_data="start")
-        ]])
-        
         await update.message.reply_text(
             message,
             parse_mode="HTML",
-            reply_markup=keyboard
+            reply_markup=_STATS_KB,
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -1688,72 +1464,77 @@ async def dataset_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         await update.message.reply_text("❌ Error al cargar estadísticas.")
 
 
+def _bookmarks_signature(message_id: int, bookmarks) -> tuple:
+    """Identify what a favorites message shows, to detect no-op refreshes."""
+    return (
+        message_id,
+        len(bookmarks),
+        tuple((bookmark.dataset_id, bookmark.dataset_title) for bookmark in bookmarks[:15])
+    )
+
+
+def _render_bookmarks(bookmarks) -> tuple[str, Optional[InlineKeyboardMarkup]]:
+    """Build the favorites message and its numbered keyboard."""
+    if not bookmarks:
+        message = (
+            "⭐ **Mis Favoritos**\n\n"
+            "❌ No tienes datasets favoritos guardados.\n\n"
+            "💡 **Para guardar favoritos:**\n"
+            "• Explora datasets desde /start\n"
+            "• Usa el botón ⭐ en la información del dataset\n"
+            "• Busca con /buscar y marca como favorito"
+        )
+        return message, None
+    
+    # Show bookmarks with numbered interface like other parts of the bot
+    shown = bookmarks[:15]  # Limit to 15 to avoid message length issues
+    bookmarks_text = "\n\n".join(
+        f"{num}{clean_text_for_markdown(bookmark.dataset_title) if bookmark.dataset_title else 'Sin título'}"
+        for num, bookmark in zip(_LIST_NUMBERS, shown)
+    )
+    
+    message = (
+        f"⭐ *Mis Favoritos* ({len(bookmarks)} datasets)\n\n"
+        f"📄 Mostrando {len(shown)} favoritos:\n\n"
+        f"{bookmarks_text}\n\n"
+        f"_Haz clic en el número para ver detalles._"
+    )
+    
+    if len(bookmarks) > 15:
+        message += f"\n\n⚠️ Mostrando solo los primeros 15 de {len(bookmarks)} favoritos."
+    
+    # Create numbered keyboard buttons
+    buttons = [
+        InlineKeyboardButton(f"{j + 1}", callback_data=_pack_fav_callback(j, bookmark.dataset_id))
+        for j, bookmark in enumerate(shown)
+    ]
+    keyboard = [buttons[i:i + 3] for i in range(0, len(buttons), 3)]  # Up to 3 buttons per row
+    
+    # Add action buttons
+    keyboard.append([
+        InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_bookmarks"),
+        _HOME_BUTTON
+    ])
+    
+    return message, InlineKeyboardMarkup(keyboard)
+
+
 async def user_bookmarks(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show user's bookmarked datasets."""
     try:
         user_id = update.message.from_user.id
-        user_db_id = db_manager.get_or_create_user(telegram_id=user_id)  # Now returns ID directly
+        user_db_id = await _get_user_db_id(user_id, context)
         
-        bookmarks = db_manager.get_user_bookmarks(user_db_id)
+        bookmarks = await _run_db(db_manager.get_user_bookmarks, user_db_id)
+        message, reply_markup = _render_bookmarks(bookmarks)
         
-        if not bookmarks:
-            message = (
-                "⭐ **Mis Favoritos**\n\n"
-                "❌ No tienes datasets favoritos guardados.\n\n"
-                "💡 **Para guardar favoritos:**\n"
-                "• Explora datasets desde /start\n"
-                "• Usa el botón ⭐ en la información del dataset\n"
-                "• Busca con /buscar y marca como favorito"
-            )
-        else:
-            # Show bookmarks with numbered interface like other parts of the bot
-            bookmarks_list = []
-            for i, bookmark in enumerate(bookmarks[:15], 1):  # Limit to 15 to avoid message length issues
-                title = clean_text_for_markdown(bookmark.dataset_title) if bookmark.dataset_title else "Sin título"
-                bookmarks_list.append(f"{i}. {title}")
-            
-            message = (
-                f"⭐ *Mis Favoritos* ({len(bookmarks)} datasets)\n\n"
-                f"📄 Mostrando {len(bookmarks_list)} favoritos:\n\n" + 
-                "\n\n".join(bookmarks_list) + "\n\n" +
-                "_Haz clic en el número para ver detalles._"
-            )
-            
-            if len(bookmarks) > 15:
-                message += f"\n\n⚠️ Mostrando solo los primeros 15 de {len(bookmarks)} favoritos."
-            
-            # Create numbered keyboard buttons
-            keyboard = []
-            for i in range(0, min(len(bookmarks), 15), 3):  # Up to 3 buttons per row
-                row = []
-                for j in range(i, min(i + 3, min(len(bookmarks), 15))):
-                    bookmark = bookmarks[j]
-                    dataset_number = j + 1
-                    callback_data = f"fav_num:{j}:{bookmark.dataset_id}"
-                    
-                    if len(callback_data.encode()) > 60:
-                        short_id = callback_mapper.get_short_id(callback_data)
-                        callback_data = f"s:{short_id}"
-                    
-                    row.append(InlineKeyboardButton(
-                        f"{dataset_number}",
-                        callback_data=callback_data
-                    ))
-                keyboard.append(row)
-            
-            # Add action buttons
-            keyboard.append([
-                InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_bookmarks"),
-                InlineKeyboardButton("🏠 Inicio", callback_data="start")
-            ])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
+        sent = await update.message.reply_text(
             message,
             parse_mode="Markdown",
-            reply_markup=reply_markup if bookmarks else None
+            reply_markup=reply_markup,
+            disable_web_page_preview=True
         )
+        context.user_data["bookmarks_sig"] = _bookmarks_signature(sent.message_id, bookmarks)
         
     except Exception as e:
         logger.error(f"Error in user_bookmarks: {e}")
@@ -1764,20 +1545,20 @@ async def handle_bookmark_toggle(query, context, dataset_id: str, dataset_title:
     """Handle bookmark toggle (add/remove)."""
     try:
         user_id = query.from_user.id
-        user_db_id = db_manager.get_or_create_user(telegram_id=user_id)  # Now returns ID directly
+        user_db_id = await _get_user_db_id(user_id, context)
         
-        is_bookmarked = db_manager.is_bookmarked(user_db_id, dataset_id)
+        is_bookmarked = await _run_db(db_manager.is_bookmarked, user_db_id, dataset_id)
         
         if is_bookmarked:
             # Remove bookmark
-            success = db_manager.remove_bookmark(user_db_id, dataset_id)
+            success = await _run_db(db_manager.remove_bookmark, user_db_id, dataset_id)
             if success:
                 await query.answer("❌ Eliminado de favoritos", show_alert=False)
             else:
                 await query.answer("❌ Error al eliminar de favoritos", show_alert=True)
         else:
             # Add bookmark
-            success = db_manager.add_bookmark(user_db_id, dataset_id, dataset_title)
+            success = await _run_db(db_manager.add_bookmark, user_db_id, dataset_id, dataset_title)
             if success:
                 await query.answer("⭐ Añadido a favoritos", show_alert=False)
             else:
@@ -1792,178 +1573,86 @@ async def handle_refresh_bookmarks_callback(query, context) -> None:
     """Handle refresh bookmarks callback."""
     try:
         user_id = query.from_user.id
-        user_db_id = db_manager.get_or_create_user(telegram_id=user_id)  # Now returns ID directly
+        user_db_id = await _get_user_db_id(user_id, context)
         
-        bookmarks = db_manager.get_user_bookmarks(user_db_id)
+        bookmarks = await _run_db(db_manager.get_user_bookmarks, user_db_id)
         
-        if not bookmarks:
-            message = (
-                "⭐ **Mis Favoritos**\n\n"
-                "❌ No tienes datasets favoritos guardados.\n\n"
-                "💡 **Para guardar favoritos:**\n"
-                "• Explora datasets desde /start\n"
-                "• Usa el botón ⭐ en la información del dataset\n"
-                "• Busca con /buscar y marca como favorito"
-            )
-            await query.edit_message_text(message, parse_mode="HTML")
-        else:
-            # Show bookmarks with numbered interface like other parts of the bot
-            bookmarks_list = []
-            for i, bookmark in enumerate(bookmarks[:15], 1):  # Limit to 15 to avoid message length issues
-                title = clean_text_for_markdown(bookmark.dataset_title) if bookmark.dataset_title else "Sin título"
-                bookmarks_list.append(f"{i}. {title}")
-            
-            message = (
-                f"⭐ *Mis Favoritos* ({len(bookmarks)} datasets)\n\n"
-                f"📄 Mostrando {len(bookmarks_list)} favoritos:\n\n" + 
-                "\n\n".join(bookmarks_list) + "\n\n" +
-                "_Haz clic en el número para ver detalles._"
-            )
-            
-            if len(bookmarks) > 15:
-                message += f"\n\n⚠️ Mostrando solo los primeros 15 de {len(bookmarks)} favoritos."
-            
-            # Create numbered keyboard buttons
-            keyboard = []
-            for i in range(0, min(len(bookmarks), 15), 3):  # Up to 3 buttons per row
-                row = []
-                for j in range(i, min(i + 3, min(len(bookmarks), 15))):
-                    bookmark = bookmarks[j]
-                    dataset_number = j + 1
-                    callback_data = f"fav_num:{j}:{bookmark.dataset_id}"
-                    
-                    if len(callback_data.encode()) > 60:
-                        short_id = callback_mapper.get_short_id(callback_data)
-                        callback_data = f"s:{short_id}"
-                    
-                    row.append(InlineKeyboardButton(
-                        f"{dataset_number}",
-                        callback_data=callback_data
-                    ))
-                keyboard.append(row)
-            
-            # Add action buttons
-            keyboard.append([
-                InlineKeyboardButton("🔄 Actualizar", callback_data="refresh_bookmarks"),
-                InlineKeyboardButton("🏠 Inicio", callback_data="start")
-            ])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            await query.edit_message_text(
-                message,
-                parse_mode="Markdown",
-                reply_markup=reply_markup
-            )
+        # Skip the edit when this message already shows the same favorites;
+        # Telegram would reject it as "message is not modified"
+        signature = _bookmarks_signature(query.message.message_id, bookmarks)
+        if context.user_data.get("bookmarks_sig") == signature:
+            return
+        context.user_data["bookmarks_sig"] = signature
+        
+        message, reply_markup = _render_bookmarks(bookmarks)
+        
+        await query.edit_message_text(
+            message,
+            parse_mode="Markdown",
+            reply_markup=reply_markup,
+            disable_web_page_preview=True
+        )
         
     except Exception as e:
         logger.error(f"Error in handle_refresh_bookmarks_callback: {e}")
         await query.edit_message_text("❌ Error al cargar favoritos.")
 
 
+# Help text shared by /help and the help button
+_HELP_MESSAGE = (
+    "🤖 <b>Ayuda - Portal de Datos Abiertos</b>\n\n"
+    
+    "🏛️ <b>Sobre este bot</b>\n"
+    "Bot oficial para explorar los datos abiertos de Castilla y León. "
+    "Accede a más de 400 datasets actualizados desde la plataforma oficial.\n\n"
+    
+    "📋 <b>Comandos principales:</b>\n"
+    "🏠 /start - Mostrar categorías y comenzar exploración\n"
+    "🔍 /buscar [término] - Buscar datasets por texto\n"
+    "🕒 /recientes - Ver datasets actualizados recientemente\n"
+    "📅 /resumen_diario - Ver resúmenes diarios de datasets nuevos\n"
+    "📊 /catalogo - Descargar catálogo completo en Excel\n"
+    "📈 /estadisticas - Ver estadísticas generales\n"
+    "⭐ /favoritos - Ver tus datasets favoritos guardados\n"
+    "🔔 /mis_alertas - Ver y gestionar tus suscripciones\n"
+    "🔤 /alertas_palabras - Crear alertas por palabras clave\n"
+    "❓ /help - Mostrar esta ayuda\n\n"
+    
+    "🎯 <b>Cómo usar el bot:</b>\n"
+    "1️⃣ Selecciona una categoría (Salud, Educación, etc.)\n"
+    "2️⃣ Elige 'Ver datasets' o refina por palabra clave\n"
+    "3️⃣ Explora datasets y descarga datos directamente\n"
+    "4️⃣ Suscríbete para recibir alertas de actualizaciones\n\n"
+    
+    "📊 <b>Formatos disponibles:</b>\n"
+    "• CSV - Datos tabulares\n"
+    "• XLSX - Hojas de cálculo Excel\n"
+    "• JSON - Datos estructurados\n"
+    "• GeoJSON - Datos geográficos\n"
+    "• PDF/ZIP - Documentos adjuntos\n\n"
+    
+    "🔔 <b>Sistema de alertas:</b>\n"
+    "• Suscríbete a categorías completas\n"
+    "• Suscríbete a datasets específicos\n"
+    "• Recibe notificaciones de nuevos datos\n"
+    "• Gestiona suscripciones con /mis_alertas\n\n"
+    
+    "👨‍💻 <b>Créditos:</b>\n"
+    "Desarrollado por: <b>Víctor Viloria Vázquez</b>\n"
+    "GitHub: @ComputingVictor\n\n"
+    
+    "💡 ¡Usa /start para comenzar a explorar!"
+)
+
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /help command."""
-    message = (
-        "🤖 <b>Ayuda - Portal de Datos Abiertos</b>\n\n"
-        
-        "🏛️ <b>Sobre este bot</b>\n"
-        "Bot oficial para explorar los datos abiertos de Castilla y León. "
-        "Accede a más de 400 datasets actualizados desde la plataforma oficial.\n\n"
-        
-        "📋 <b>Comandos principales:</b>\n"
-        "🏠 /start - Mostrar categorías y comenzar exploración\n"
-        "🔍 /buscar [término] - Buscar datasets por texto\n"
-        "🕒 /recientes - Ver datasets actualizados recientemente\n"
-        "📅 /resumen_diario - Ver resúmenes diarios de datasets nuevos\n"
-        "📊 /catalogo - Descargar catálogo completo en Excel\n"
-        "📈 /estadisticas - Ver estadísticas generales\n"
-        "⭐ /favoritos - Ver tus datasets favoritos guardados\n"
-        "🔔 /mis_alertas - Ver y gestionar tus suscripciones\n"
-        "🔤 /alertas_palabras - Crear alertas por palabras clave\n"
-        "❓ /help - Mostrar esta ayuda\n\n"
-        
-        "🎯 <b>Cómo usar el bot:</b>\n"
-        "1️⃣ Selecciona una categoría (Salud, Educación, etc.)\n"
-        "2️⃣ Elige 'Ver datasets' o refina por palabra clave\n"
-        "3️⃣ Explora datasets y descarga datos directamente\n"
-        "4️⃣ Suscríbete para recibir alertas de actualizaciones\n\n"
-        
-        "📊 <b>Formatos disponibles:</b>\n"
-        "• CSV - Datos tabulares\n"
-        "• XLSX - Hojas de cálculo Excel\n"
-        "• JSON - Datos estructurados\n"
-        "• GeoJSON - Datos geográficos\n"
-        "• PDF/ZIP - Documentos adjuntos\n\n"
-        
-        "🔔 <b>Sistema de alertas:</b>\n"
-        "• Suscríbete a categorías completas\n"
-        "• Suscríbete a datasets específicos\n"
-        "• Recibe notificaciones de nuevos datos\n"
-        "• Gestiona suscripciones con /mis_alertas\n\n"
-        
-        "👨‍💻 <b>Créditos:</b>\n"
-        "Desarrollado por: <b>Víctor Viloria Vázquez</b>\n"
-        "GitHub: @ComputingVictor\n\n"
-        
-        "💡 ¡Usa /start para comenzar a explorar!"
-    )
-    
-    await update.message.reply_text(message, parse_mode="HTML")
+    await update.message.reply_text(_HELP_MESSAGE, parse_mode="HTML", disable_web_page_preview=True)
 
 
 async def show_help_callback(query, context) -> None:
     """Handle help callback from inline keyboard."""
-    message = (
-        "🤖 <b>Ayuda - Portal de Datos Abiertos</b>\n\n"
-        
-        "🏛️ <b>Sobre este bot</b>\n"
-        "Bot oficial para explorar los datos abiertos de Castilla y León. "
-        "Accede a más de 400 datasets actualizados desde la plataforma oficial.\n\n"
-        
-        "📋 <b>Comandos principales:</b>\n"
-        "🏠 /start - Mostrar categorías y comenzar exploración\n"
-        "🔍 /buscar [término] - Buscar datasets por texto\n"
-        "🕒 /recientes - Ver datasets actualizados recientemente\n"
-        "📅 /resumen_diario - Ver resúmenes diarios de datasets nuevos\n"
-        "📊 /catalogo - Descargar catálogo completo en Excel\n"
-        "📈 /estadisticas - Ver estadísticas generales\n"
-        "⭐ /favoritos - Ver tus datasets favoritos guardados\n"
-        "🔔 /mis_alertas - Ver y gestionar tus suscripciones\n"
-        "🔤 /alertas_palabras - Crear alertas por palabras clave\n"
-        "❓ /help - Mostrar esta ayuda\n\n"
-        
-        "🎯 <b>Cómo usar el bot:</b>\n"
-        "1️⃣ Selecciona una categoría (Salud, Educación, etc.)\n"
-        "2️⃣ Elige 'Ver datasets' o refina por palabra clave\n"
-        "3️⃣ Explora datasets y descarga datos directamente\n"
-        "4️⃣ Suscríbete para recibir alertas de actualizaciones\n\n"
-        
-        "📊 <b>Formatos disponibles:</b>\n"
-        "• CSV - Datos tabulares\n"
-        "• XLSX - Hojas de cálculo Excel\n"
-        "• JSON - Datos estructurados\n"
-        "• GeoJSON - Datos geográficos\n"
-        "• PDF/ZIP - Documentos adjuntos\n\n"
-        
-        "🔔 <b>Sistema de alertas:</b>\n"
-        "• Suscríbete a categorías completas\n"
-        "• Suscríbete a datasets específicos\n"
-        "• Recibe notificaciones de nuevos datos\n"
-        "• Gestiona suscripciones con /mis_alertas\n\n"
-        
-        "👨‍💻 <b>Créditos:</b>\n"
-        "Desarrollado por: <b>Víctor Viloria Vázquez</b>\n"
-        "GitHub: @ComputingVictor\n\n"
-        
-        "💡 ¡Usa /start para comenzar a explorar!"
-    )
-    
-    from .keyboards import InlineKeyboardMarkup, InlineKeyboardButton
-    keyboard = InlineKeyboardMarkup([
-        [InlineKeyboardButton("🏠 Volver al inicio", callback_data="start")]
-    ])
-    
-    await query.edit_message_text(message, parse_mode="HTML", reply_markup=keyboard)
+    await query.edit_message_text(_HELP_MESSAGE, parse_mode="HTML", reply_markup=_HELP_KB, disable_web_page_preview=True)
 
 
 async def handle_dataset_preview(query, context, dataset_id: str) -> None:
@@ -1978,7 +1667,8 @@ async def handle_dataset_preview(query, context, dataset_id: str) -> None:
             return
         
         # Create preview message with dataset info
-        title = dataset.title[:50] + "..." if len(dataset.title) > 50 else dataset.title
+        title = html.escape(_truncate(dataset.title, 50), quote=False)
+        friendly_date = format_user_friendly_date(dataset.data_processed)
         records_text = f"{dataset.records_count:,}" if dataset.records_count else "Dato no disponible"
         
         preview_message = (
@@ -1991,10 +1681,7 @@ async def handle_dataset_preview(query, context, dataset_id: str) -> None:
         )
         
         # Create back button
-        callback_data = f"dataset:{dataset_id}"
-        if len(callback_data.encode()) > 60:
-            short_id = callback_mapper.get_short_id(callback_data)
-            callback_data = f"s:{short_id}"
+        callback_data = _pack_dataset_callback(dataset_id)
         
         keyboard = InlineKeyboardMarkup([
             [InlineKeyboardButton("⬅️ Volver al dataset", callback_data=callback_data)]
@@ -2014,9 +1701,11 @@ async def handle_dataset_preview(query, context, dataset_id: str) -> None:
 async def show_export_menu(query, context, dataset_id: str) -> None:
     """Show export format selection menu."""
     try:
-        # Get dataset info and exports
-        dataset = await api_client.get_dataset_info(dataset_id)
-        exports = await api_client.get_dataset_exports(dataset_id)
+        # Get dataset info and exports concurrently
+        dataset, exports = await asyncio.gather(
+            api_client.get_dataset_info(dataset_id),
+            api_client.get_dataset_exports(dataset_id)
+        )
         
         if not dataset:
             await query.answer("❌ Dataset no encontrado", show_alert=True)
@@ -2025,7 +1714,7 @@ async def show_export_menu(query, context, dataset_id: str) -> None:
         # Create the export menu
         keyboard = create_export_menu_keyboard(dataset_id, exports)
         
-        title = dataset.title[:60] + "..." if len(dataset.title) > 60 else dataset.title
+        title = _truncate(dataset.title, 60)
         
         message = (
             f"💾 <b>Exportar: {title}</b>\n\n"
@@ -2071,7 +1760,7 @@ async def handle_dataset_share(query, context, dataset_id: str) -> None:
             return
         
         # Create share message with dataset info and link
-        title = dataset.title[:60] + "..." if len(dataset.title) > 60 else dataset.title
+        title = _truncate(dataset.title, 60)
         web_url = f"https://analisis.datosabiertos.jcyl.es/explore/dataset/{dataset_id}"
         
         share_message = (
@@ -2085,10 +1774,7 @@ async def handle_dataset_share(query, context, dataset_id: str) -> None:
         )
         
         # Create back button and web link button
-        callback_data = f"dataset:{dataset_id}"
-        if len(callback_data.encode()) > 60:
-            short_id = callback_mapper.get_short_id(callback_data)
-            callback_data = f"s:{short_id}"
+        callback_data = _pack_dataset_callback(dataset_id)
         
         keyboard = InlineKeyboardMarkup([
             [InlineKeyboardButton("🌐 Abrir en navegador", url=web_url)],
@@ -2125,8 +1811,8 @@ async def handle_text_search(update: Update, context: ContextTypes.DEFAULT_TYPE)
             )
             return
         
-        # Show search indicator
-        await update.message.reply_text(f"🔍 Buscando '{search_term}'...")
+        # Show a typing indicator without waiting on it or posting an extra message
+        _run_in_background(update.message.chat.send_action(ChatAction.TYPING))
         
         # Use the global API client instance to maintain cache consistency
         # Use consistent sorting to ensure stable pagination
@@ -2149,29 +1835,13 @@ async def handle_text_search(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text(no_results_message)
             return
         
-        keyboard = create_search_results_keyboard(datasets, search_term, 0, settings.datasets_per_page, total_count)
-        
-        # Show all search results with full titles
-        search_results = []
-        for i, dataset in enumerate(datasets, 1):
-            title = clean_text_for_markdown(dataset.title) if dataset.title else "Sin título"
-            # Don't truncate - show full title
-            search_results.append(f"{i}. {title}")
-        
-        clean_search_term = clean_text_for_markdown(search_term)
-        total_pages = (total_count + settings.datasets_per_page - 1) // settings.datasets_per_page
-        message = (
-            f"🔍 <b>Resultados: '{clean_search_term}'</b>\n\n"
-            f"📊 <b>Total:</b> {total_count} datasets encontrados\n"
-            f"📄 <b>Página:</b> 1 de {total_pages} ({len(datasets)} datasets)\n\n"
-            f"<b>Datasets encontrados:</b>\n" + "\n\n".join(search_results) + "\n\n"
-            f"💡 <i>Haz clic en el número para ver detalles del dataset.</i>"
-        )
+        message, keyboard = _render_search(datasets, search_term, 0, total_count)
         
         await update.message.reply_text(
             message,
             parse_mode="HTML",
-            reply_markup=keyboard
+            reply_markup=keyboard,
+            disable_web_page_preview=True
         )
         
     except Exception as e:
@@ -2179,139 +1849,141 @@ async def handle_text_search(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("❌ Error al realizar la búsqueda. Intenta nuevamente.")
 
 
+async def _build_catalog_xlsx(loading_message) -> Optional[tuple[bytes, int, bool]]:
+    """Download the catalog and render it as XLSX bytes, or None when it is empty.
+    
+    The flag is False when fewer datasets than expected arrived, e.g. because a page
+    request failed and the client returned an empty page.
+    """
+    limit = 100  # Smaller batches for stability
+    max_datasets = 1000  # Limit to prevent timeouts
+    
+    # The first page tells us how many more pages to request
+    logger.info(f"Fetching batch: offset=0, limit={limit}")
+    all_datasets, total_estimate = await api_client.get_datasets(limit=limit, offset=0)
+    all_datasets = list(all_datasets)  # Copy: the client may hand back a cached list
+    logger.info(f"Got {len(all_datasets)} datasets in first batch, ~{total_estimate} available")
+    
+    if len(all_datasets) == limit:
+        await loading_message.edit_text(
+            f"📊 Procesando datasets...\n\n"
+            f"Descargados: {len(all_datasets)}\n"
+            f"Progreso: {limit:,} de ~{total_estimate:,}"
+        )
+        
+        # Fetch the remaining pages concurrently, a few at a time to spare the upstream API
+        semaphore = asyncio.Semaphore(5)
+        get_datasets = api_client.get_datasets
+        
+        async def fetch_page(page_offset: int):
+            async with semaphore:
+                logger.info(f"Fetching batch: offset={page_offset}, limit={limit}")
+                batch, _ = await get_datasets(limit=limit, offset=page_offset)
+                return batch
+        
+        offsets = range(limit, min(total_estimate, max_datasets), limit)
+        tasks = [asyncio.create_task(fetch_page(page_offset)) for page_offset in offsets]
+        
+        # Report progress as pages arrive, at most every 2 seconds (and on the last page)
+        # to stay clear of Telegram's edit rate limit
+        downloaded = len(all_datasets)
+        last_edit = time.monotonic()
+        try:
+            for completed, next_batch in enumerate(asyncio.as_completed(tasks), 1):
+                downloaded += len(await next_batch)
+                now = time.monotonic()
+                if now - last_edit < 2.0 and completed < len(tasks):
+                    continue
+                last_edit = now
+                await loading_message.edit_text(
+                    f"📊 Procesando datasets...\n\n"
+                    f"Descargados: {downloaded}\n"
+                    f"Progreso: {downloaded:,} de ~{total_estimate:,}"
+                )
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        for batch_datasets in (task.result() for task in tasks):
+            all_datasets.extend(batch_datasets)
+            # A short page means we reached the end of the catalog
+            if len(batch_datasets) < limit:
+                break
+    
+    logger.info(f"Downloaded {len(all_datasets)} datasets for catalog export")
+    
+    # Prepare data for Excel
+    await loading_message.edit_text("📊 Preparando archivo Excel...")
+    
+    if not all_datasets:
+        return None
+    
+    # The workbook is built in memory, on a worker thread so other updates keep flowing
+    buffer = io.BytesIO()
+    row_count = await asyncio.to_thread(write_catalog_xlsx, buffer, all_datasets)
+    logger.info(f"Wrote {row_count} rows for Excel export")
+    complete = len(all_datasets) >= min(total_estimate, max_datasets)
+    return buffer.getvalue(), row_count, complete
+
+
 async def export_catalog_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle /catalogo command - Export full catalog as XLSX."""
     loading_message = await update.message.reply_text("📊 Generando catálogo completo en XLSX...\n\nEsto puede tomar unos minutos.")
     
     try:
-        # Get all datasets
-        logger.info("Starting catalog export...")
-        all_datasets = []
-        offset = 0
-        limit = 100  # Smaller batches for stability
-        max_datasets = 1000  # Limit to prevent timeouts
-        
-        while True:
-            logger.info(f"Fetching batch: offset={offset}, limit={limit}")
-            batch_datasets, total_estimate = await api_client.get_datasets(
-                limit=limit, 
-                offset=offset
-            )
-            
-            logger.info(f"Got {len(batch_datasets)} datasets in this batch")
-            
-            if not batch_datasets:
-                logger.info("No more datasets, stopping")
-                break
-                
-            all_datasets.extend(batch_datasets)
-            offset += limit
-            
-            # Update progress
-            await loading_message.edit_text(
-                f"📊 Procesando datasets...\n\n"
-                f"Descargados: {len(all_datasets)}\n"
-                f"Progreso: {offset:,} de ~{total_estimate:,}"
-            )
-            
-            # If we got fewer than the limit, we're at the end
-            if len(batch_datasets) < limit:
-                logger.info(f"Got {len(batch_datasets)} < {limit}, assuming end of data")
-                break
-            
-            # Safety check to prevent infinite loops and timeouts
-            if len(all_datasets) >= max_datasets:
-                logger.warning(f"Reached maximum dataset limit {max_datasets}, stopping")
-                break
+        # One export at a time; requests that were waiting reuse the fresh result
+        async with _catalog_lock:
+            cached = _catalog_cache.get("xlsx")
+            if cached and time.monotonic() - cached[0] < _CATALOG_CACHE_TTL:
+                logger.info("Serving catalog export from cache")
+                _, xlsx_data, dataset_count = cached
+            else:
+                logger.info("Starting catalog export...")
+                built = await _build_catalog_xlsx(loading_message)
+                if built is None:
+                    logger.error("No datasets to export!")
+                    await loading_message.edit_text("❌ Error: No hay datos para exportar.")
+                    return
+                xlsx_data, dataset_count, complete = built
+                # A truncated catalog is still sent, but never served to later callers
+                if complete:
+                    _catalog_cache["xlsx"] = (time.monotonic(), xlsx_data, dataset_count)
+                else:
+                    logger.warning(f"Catalog export incomplete ({dataset_count} datasets), not caching it")
         
-        logger.info(f"Downloaded {len(all_datasets)} datasets for catalog export")
-        
-        # Prepare data for Excel
-        await loading_message.edit_text("📊 Preparando archivo Excel...")
-        
-        catalog_data = []
-        for dataset in all_datasets:
-            catalog_data.append({
-                'ID': dataset.dataset_id or '',
-                'Título': dataset.title or 'Sin título',
-                'Descripción': dataset.description or 'Sin descripción',
-                'Editor': dataset.publisher or 'Sin editor',
-                'Temas': ', '.join(dataset.themes) if dataset.themes else 'Sin temas',
-                'Palabras Clave': ', '.join(dataset.keywords) if dataset.keywords else 'Sin palabras clave',
-                'Última Modificación': dataset.modified or 'Sin fecha',
-                'Registros': dataset.records_count if dataset.records_count is not None else 0,
-                'Licencia': dataset.license or 'Sin licencia'
-            })
-            
-        logger.info(f"Prepared {len(catalog_data)} rows for Excel export")
+        # Send file
+        await loading_message.edit_text("📊 Enviando archivo...")
         
-        # Create DataFrame
-        df = pd.DataFrame(catalog_data)
-        logger.info(f"Created DataFrame with shape: {df.shape}")
-        logger.info(f"DataFrame columns: {list(df.columns)}")
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        filename = f"catalogo_datos_abiertos_cyl_{current_date}.xlsx"
         
-        if df.empty:
-            logger.error("DataFrame is empty!")
-            await loading_message.edit_text("❌ Error: No hay datos para exportar.")
-            return
+        # Check file size before sending
+        file_size = len(xlsx_data)
+        logger.info(f"Excel file created with size: {file_size} bytes")
         
-        # Show sample data
-        logger.info(f"Sample data from first row: {df.iloc[0].to_dict()}")
+        if file_size < 1000:  # Less than 1KB is suspicious
+            logger.warning(f"Excel file seems too small: {file_size} bytes")
         
-        # Create Excel file in memory
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp_file:
-            with pd.ExcelWriter(tmp_file.name, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Catálogo Completo', index=False)
-                
-                # Auto-adjust column widths
-                worksheet = writer.sheets['Catálogo Completo']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Send file
-            await loading_message.edit_text("📊 Enviando archivo...")
-            
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            filename = f"catalogo_datos_abiertos_cyl_{current_date}.xlsx"
-            
-            # Check file size before sending
-            file_size = os.path.getsize(tmp_file.name)
-            logger.info(f"Excel file created with size: {file_size} bytes")
-            
-            if file_size < 1000:  # Less than 1KB is suspicious
-                logger.warning(f"Excel file seems too small: {file_size} bytes")
-            
-            with open(tmp_file.name, 'rb') as file:
-                await update.message.reply_document(
-                    document=file,
-                    filename=filename,
-                    caption=(
-                        f"📊 **Catálogo Completo de Datos Abiertos de Castilla y León**\n\n"
-                        f"🗓️ **Generado:** {current_date}\n"
-                        f"📄 **Total datasets:** {len(all_datasets):,}\n"
-                        f"📋 **Columnas incluidas:**\n"
-                        f"• ID, Título, Descripción\n"
-                        f"• Editor, Temas, Palabras Clave\n"
-                        f"• Última Modificación, Registros, Licencia\n\n"
-                        f"_Archivo actualizado desde el portal oficial_"
-                    ),
-                    parse_mode="Markdown"
-                )
-            
-            # Clean up
-            os.unlink(tmp_file.name)
-            await loading_message.delete()
-            
-            logger.info(f"Catalog export completed successfully: {len(all_datasets)} datasets")
+        await update.message.reply_document(
+            document=xlsx_data,
+            filename=filename,
+            caption=(
+                f"📊 **Catálogo Completo de Datos Abiertos de Castilla y León**\n\n"
+                f"🗓️ **Generado:** {current_date}\n"
+                f"📄 **Total datasets:** {dataset_count:,}\n"
+                f"📋 **Columnas incluidas:**\n"
+                f"• ID, Título, Descripción\n"
+                f"• Editor, Temas, Palabras Clave\n"
+                f"• Última Modificación, Registros, Licencia\n\n"
+                f"_Archivo actualizado desde el portal oficial_"
+            ),
+            parse_mode="Markdown"
+        )
+        
+        await loading_message.delete()
+        
+        logger.info(f"Catalog export completed successfully: {dataset_count} datasets")
             
     except Exception as e:
         logger.error(f"Error in export_catalog_command: {e}", exc_info=True)
@@ -2323,6 +1995,18 @@ async def export_catalog_command(update: Update, context: ContextTypes.DEFAULT_T
         )
 
 
+@lru_cache(maxsize=256)
+def _alert_nav_row(index: int, total: int) -> tuple:
+    """Anterior/Siguiente buttons for position index of total alert datasets."""
+    nav_row = []
+    if total > 1:
+        if index > 0:
+            nav_row.append(InlineKeyboardButton("⬅️ Anterior", callback_data=f"alert_nav:{index - 1}"))
+        if index < total - 1:
+            nav_row.append(InlineKeyboardButton("➡️ Siguiente", callback_data=f"alert_nav:{index + 1}"))
+    return tuple(nav_row)
+
+
 async def handle_alert_navigation(query, context) -> None:
     """Handle navigation between alert datasets."""
     try:
@@ -2330,7 +2014,7 @@ async def handle_alert_navigation(query, context) -> None:
         data = query.data
         
         # Extract new index from callback data
-        new_index = int(data.split(":", 1)[1])
+        new_index = int(data[10:])  # after "alert_nav:"
         
         # Get stored alert data
         if user_id not in alert_sessions:
@@ -2350,9 +2034,6 @@ async def handle_alert_navigation(query, context) -> None:
         current_dataset = datasets[new_index]
         total_datasets = len(datasets)
         
-        # Import needed functions from alerts module
-        from ..services.alerts import clean_dataset_title, clean_publisher_name, format_date_for_user
-        
         # Create message for current dataset
         title_text = clean_dataset_title(current_dataset.title)
         publisher_text = clean_publisher_name(current_dataset.publisher)
@@ -2372,24 +2053,15 @@ async def handle_alert_navigation(query, context) -> None:
         else:
             message += "Usa los botones para más acciones."
         
-        # Create navigation keyboard
-        keyboard = []
-        
-        if total_datasets > 1:
-            nav_row = []
-            if new_index > 0:
-                nav_row.append(InlineKeyboardButton("⬅️ Anterior", callback_data=f"alert_nav:{new_index-1}"))
-            if new_index < total_datasets - 1:
-                nav_row.append(InlineKeyboardButton("➡️ Siguiente", callback_data=f"alert_nav:{new_index+1}"))
-            
-            if nav_row:
-                keyboard.append(nav_row)
+        # Create navigation keyboard (the nav row depends only on the position)
+        nav_row = _alert_nav_row(new_index, total_datasets)
+        keyboard = [nav_row] if nav_row else []
         
         # Add action buttons
-        keyboard.append([
-            InlineKeyboardButton("📋 Ver detalles", callback_data=f"dataset:{current_dataset.dataset_id}"),
-            InlineKeyboardButton("🏠 Inicio", callback_data="start")
-        ])
+        keyboard.append((
+            InlineKeyboardButton("📋 Ver detalles", callback_data=_pack_dataset_callback(current_dataset.dataset_id)),
+            _HOME_BUTTON
+        ))
         
         reply_markup = InlineKeyboardMarkup(keyboard)
         
@@ -2407,21 +2079,42 @@ async def handle_alert_navigation(query, context) -> None:
         await query.edit_message_text("❌ Error en la navegación. Usa /start para continuar.")
 
 
+@lru_cache(maxsize=16)
+def _daily_summary_keyboard(today: date, target_date: date, highlight: bool = True) -> InlineKeyboardMarkup:
+    """Buttons for the last 7 days (2 rows) plus a refresh button for target_date."""
+    keyboard = []
+    recent_dates = [today - timedelta(days=i) for i in range(7)]
+    
+    for i in range(0, 7, 4):
+        row = []
+        for date_obj in recent_dates[i:i + 4]:
+            label = "Hoy" if date_obj == today else f"{date_obj.day}/{date_obj.month}"
+            
+            # Highlight current selection
+            if highlight and date_obj == target_date:
+                label = f"• {label} •"
+            
+            row.append(InlineKeyboardButton(label, callback_data=f"daily_summary:{date_obj.isoformat()}"))
+        keyboard.append(row)
+    
+    # Add refresh button
+    keyboard.append([
+        InlineKeyboardButton("🔄 Actualizar", callback_data=f"daily_summary:{target_date.isoformat()}")
+    ])
+    
+    return InlineKeyboardMarkup(keyboard)
+
+
 async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Show daily summary of new datasets."""
     try:
-        from datetime import date, timedelta
-        from ..services.daily_summary import DailySummaryService
-        
-        daily_service = DailySummaryService()
-        
         # Get date from command args or default to today
         target_date = date.today()
         if context.args:
             try:
                 # Try to parse date in YYYY-MM-DD format
                 date_str = context.args[0]
-                target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+                target_date = date.fromisoformat(date_str)
             except ValueError:
                 await update.message.reply_text(
                     "❌ Formato de fecha inválido. Usa YYYY-MM-DD (ejemplo: 2025-09-07)"
@@ -2443,27 +2136,8 @@ async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         # Format and send message
         message = daily_service.format_daily_summary_message(summary)
         
-        # Create keyboard with recent days navigation
-        keyboard = []
-        today = date.today()
-        recent_dates = [today - timedelta(days=i) for i in range(7)]
-        
-        # Create buttons for last 7 days (2 rows)
-        for i in range(0, 7, 4):
-            row = []
-            for j in range(i, min(i + 4, 7)):
-                date_obj = recent_dates[j]
-                date_str = date_obj.strftime('%Y-%m-%d')
-                label = "Hoy" if date_obj == today else f"{date_obj.day}/{date_obj.month}"
-                row.append(InlineKeyboardButton(label, callback_data=f"daily_summary:{date_str}"))
-            keyboard.append(row)
-        
-        # Add refresh button
-        keyboard.append([
-            InlineKeyboardButton("🔄 Actualizar", callback_data=f"daily_summary:{target_date.strftime('%Y-%m-%d')}")
-        ])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Keyboard with recent days navigation
+        reply_markup = _daily_summary_keyboard(date.today(), target_date, highlight=False)
         
         await update.message.reply_text(
             message,
@@ -2471,9 +2145,6 @@ async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
             reply_markup=reply_markup
         )
         
-        # Close service
-        await daily_service.close()
-        
     except Exception as e:
         logger.error(f"Error in daily_summary: {e}")
         await update.message.reply_text("❌ Error al cargar el resumen diario.")
@@ -2482,14 +2153,9 @@ async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
 async def handle_daily_summary_callback(query, context) -> None:
     """Handle daily summary callback."""
     try:
-        from datetime import datetime
-        from ..services.daily_summary import DailySummaryService
-        
         # Extract date from callback data
-        _, date_str = query.data.split(":")
-        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        
-        daily_service = DailySummaryService()
+        date_str = query.data[14:]  # after "daily_summary:"
+        target_date = date.fromisoformat(date_str)
         
         # Get summary for the date
         summary = await daily_service.get_daily_summary(target_date)
@@ -2506,33 +2172,8 @@ async def handle_daily_summary_callback(query, context) -> None:
         # Format message
         message = daily_service.format_daily_summary_message(summary)
         
-        # Create keyboard with navigation
-        keyboard = []
-        from datetime import date, timedelta
-        today = date.today()
-        recent_dates = [today - timedelta(days=i) for i in range(7)]
-        
-        # Create buttons for last 7 days
-        for i in range(0, 7, 4):
-            row = []
-            for j in range(i, min(i + 4, 7)):
-                date_obj = recent_dates[j]
-                date_obj_str = date_obj.strftime('%Y-%m-%d')
-                label = "Hoy" if date_obj == today else f"{date_obj.day}/{date_obj.month}"
-                
-                # Highlight current selection
-                if date_obj == target_date:
-                    label = f"• {label} •"
-                
-                row.append(InlineKeyboardButton(label, callback_data=f"daily_summary:{date_obj_str}"))
-            keyboard.append(row)
-        
-        # Add refresh button
-        keyboard.append([
-            InlineKeyboardButton("🔄 Actualizar", callback_data=f"daily_summary:{date_str}")
-        ])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        # Keyboard with navigation, highlighting the selected day
+        reply_markup = _daily_summary_keyboard(date.today(), target_date)
         
         await query.edit_message_text(
             message,
@@ -2540,9 +2181,6 @@ async def handle_daily_summary_callback(query, context) -> None:
             reply_markup=reply_markup
         )
         
-        # Close service
-        await daily_service.close()
-        
     except Exception as e:
         logger.error(f"Error in handle_daily_summary_callback: {e}")
         await query.edit_message_text("❌ Error al cargar el resumen diario.")
@@ -2550,8 +2188,11 @@ async def handle_daily_summary_callback(query, context) -> None:
 
 async def handle_file_download(query, context, data: str) -> None:
     """Handle file download request and send as attachment."""
+    import tempfile
+    
     logger.info("🎯 handle_file_download called!")
     loading_msg = None
+    file_stream = None
     
     try:
         logger.info(f"📞 Processing file download with resolved data: {data}")
@@ -2586,18 +2227,27 @@ async def handle_file_download(query, context, data: str) -> None:
         
         # Download the file
         logger.info(f"⬇️  Downloading from: {file_url}")
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(file_url)
+        # Stream to a spooled file (memory first, disk past 8MB) and stop once over the limit
+        max_size = 50 * 1024 * 1024  # 50MB limit
+        file_stream = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        async with _download_client.stream("GET", file_url) as response:
             response.raise_for_status()
-            file_data = response.content
+            file_size = int(response.headers.get("content-length") or 0)
+            if file_size <= max_size:
+                file_size = 0
+                async for chunk in response.aiter_bytes(65536):
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        break
+                    file_stream.write(chunk)
             
-        file_size_mb = len(file_data) / 1024 / 1024
+        file_size_mb = file_size / 1024 / 1024
         logger.info(f"✅ Download completed: {file_size_mb:.2f} MB")
         
         # Check size limit
-        if len(file_data) > 50 * 1024 * 1024:  # 50MB limit
+        if file_size > max_size:
             error_msg = (
-                f"❌ Archivo muy grande ({file_size_mb:.1f} MB).\n"
+                f"❌ Archivo muy grande (más de 50 MB).\n"
                 f"Límite de Telegram: 50MB\n\n"
                 f"Usa el enlace web para descargarlo."
             )
@@ -2612,9 +2262,10 @@ async def handle_file_download(query, context, data: str) -> None:
         try:
             dataset = await api_client.get_dataset_info(dataset_id)
             title = dataset.title if dataset else "Dataset"
+            title_html = dataset.title_html if dataset else "Dataset"
             records = dataset.records_count if dataset and dataset.records_count else None
         except:
-            title = "Dataset"
+            title = title_html = "Dataset"
             records = None
         
         # Create filename
@@ -2624,7 +2275,7 @@ async def handle_file_download(query, context, data: str) -> None:
         
         # Create caption
         caption = (
-            f"📎 <b>{html.escape(title)}</b>\n\n"
+            f"📎 <b>{title_html}</b>\n\n"
             f"📊 Formato: {file_format.upper()}\n"
             f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M')}\n"
             f"💾 Tamaño: {file_size_mb:.1f} MB"
@@ -2632,9 +2283,7 @@ async def handle_file_download(query, context, data: str) -> None:
         if records:
             caption += f"\n📄 Registros: {records:,}"
         
-        # Create file stream
-        file_stream = io.BytesIO(file_data)
-        file_stream.name = filename
+        file_stream.seek(0)
         
         # Send document
         logger.info(f"📤 Sending document...")
@@ -2680,4 +2329,7 @@ async def handle_file_download(query, context, data: str) -> None:
             await loading_msg.edit_text(error_msg)
         else:
             await context.bot.send_message(chat_id=query.message.chat.id, text=error_msg)
+    finally:
+        if file_stream is not None:
+            file_stream.close()
 
@@ -1,9 +1,13 @@
 """Telegram bot setup and main application."""
 
+import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
+from telegram.error import RetryAfter
+from telegram.ext import Application, BaseRateLimiter, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 
 from ..services.config import get_settings
 from .handlers import (
@@ -19,7 +23,8 @@ from .handlers import (
     handle_text_search,
     keyword_alerts_command,
     daily_summary,
-    export_catalog_command
+    export_catalog_command,
+    close_http_clients
 )
 
 logger = logging.getLogger(__name__)
@@ -27,13 +32,55 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+class OutgoingRateLimiter(BaseRateLimiter):
+    """Spread outgoing Bot API requests to stay under Telegram's global flood limit."""
+    
+    def __init__(self, max_rate: float = 25, max_retries: int = 1):
+        self._interval = 1 / max_rate
+        self._max_retries = max_retries
+        self._next_slot = 0.0
+    
+    async def initialize(self) -> None:
+        pass
+    
+    async def shutdown(self) -> None:
+        pass
+    
+    async def _wait_for_slot(self) -> None:
+        # Reserve the next free slot before sleeping so concurrent senders queue up
+        now = time.monotonic()
+        delay = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        for attempt in range(self._max_retries + 1):
+            # Callback answers only stop the button spinner; never delay them
+            if endpoint != "answerCallbackQuery":
+                await self._wait_for_slot()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self._max_retries:
+                    raise
+                logger.warning(f"Flood control on {endpoint}, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+
+
 def create_bot_application() -> Application:
     """Create and configure the Telegram bot application."""
     if not settings.telegram_bot_token:
         raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
     
     # Create application
-    application = Application.builder().token(settings.telegram_bot_token).build()
+    application = (
+        Application.builder()
+        .token(settings.telegram_bot_token)
+        .rate_limiter(OutgoingRateLimiter())
+        .post_shutdown(close_http_clients)
+        .build()
+    )
     
     # Add handlers
     application.add_handler(CommandHandler("start", start_command))
@@ -67,6 +114,9 @@ async def start_bot() -> None:
     """Start the Telegram bot."""
     application = create_bot_application()
     
+    # Handlers run blocking DB calls in the default executor; size it for bursts
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=20))
+    
     # Initialize the application
     await application.initialize()
     
@@ -84,8 +134,6 @@ async def start_bot() -> None:
 
 
 if __name__ == "__main__":
-    import asyncio
-    
     logging.basicConfig(
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         level=logging.INFO
@@ -2,26 +2,40 @@
 
 import logging
 import os
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from sqlalchemy import (
     Boolean,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
+    case,
     create_engine,
+    func,
+    select,
+    update,
 )
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, relationship, sessionmaker
 
 Base = declarative_base()
 logger = logging.getLogger(__name__)
 
+# Seconds a telegram_id -> users.id mapping is trusted without hitting the DB
+_USER_ID_CACHE_TTL = 3600
+
+# Dialects supporting INSERT ... ON CONFLICT, used for single-statement upserts
+_UPSERT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
 
 class User(Base):
     __tablename__ = "users"
@@ -58,6 +72,8 @@ class Subscription(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "subscription_type", "subscription_id", name="unique_user_subscription"),
+        # Alert fan-out looks up subscribers by (type, id) across all users
+        Index("ix_subscription_type_id_active", "subscription_type", "subscription_id", "is_active"),
     )
 
     def __repr__(self) -> str:
@@ -142,10 +158,15 @@ class DatabaseManager:
         self.database_url = database_url or os.getenv("DATABASE_URL", "sqlite:///jcyl_bot.db")
         self.engine = create_engine(self.database_url, echo=False)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # telegram_id -> (monotonic timestamp, users.id) for repeated lookups
+        self._user_id_cache: Dict[int, Tuple[float, int]] = {}
 
     def create_tables(self) -> None:
         """Create all tables."""
         Base.metadata.create_all(bind=self.engine)
+        # create_all skips existing tables, so add indexes introduced later explicitly
+        for index in Subscription.__table__.indexes:
+            index.create(bind=self.engine, checkfirst=True)
 
     def get_session(self) -> Session:
         """Get database session."""
@@ -153,6 +174,12 @@ class DatabaseManager:
 
     def get_or_create_user(self, telegram_id: int, **kwargs) -> int:
         """Get or create user by telegram ID. Returns user.id."""
+        # Plain lookups (no profile fields to update) can be served from cache
+        if not kwargs:
+            cached = self._user_id_cache.get(telegram_id)
+            if cached and time.monotonic() - cached[0] < _USER_ID_CACHE_TTL:
+                return cached[1]
+        
         session = self.get_session()
         try:
             user = session.query(User).filter(User.telegram_id == telegram_id).first()
@@ -168,6 +195,7 @@ class DatabaseManager:
                         setattr(user, key, value)
                 user.updated_at = datetime.utcnow()
                 session.commit()
+            self._user_id_cache[telegram_id] = (time.monotonic(), user.id)
             return user.id  # Return only the ID to avoid session issues
         finally:
             session.close()
@@ -179,7 +207,13 @@ class DatabaseManager:
         subscription_id: str, 
         subscription_name: Optional[str] = None
     ) -> bool:
-        """Add subscription for user. Returns True if added, False if already exists."""
+        """Add or reactivate a subscription. Returns True if added or reactivated, False if already active."""
+        upsert_insert = _UPSERT_INSERTS.get(self.engine.dialect.name)
+        if upsert_insert is not None:
+            return self._upsert_subscription(
+                upsert_insert, user_id, subscription_type, subscription_id, subscription_name
+            )
+        
         session = self.get_session()
         try:
             existing = session.query(Subscription).filter(
@@ -189,10 +223,11 @@ class DatabaseManager:
             ).first()
             
             if existing:
-                if not existing.is_active:
-                    existing.is_active = True
-                    session.commit()
-                return False
+                if existing.is_active:
+                    return False
+                existing.is_active = True
+                session.commit()
+                return True
                 
             subscription = Subscription(
                 user_id=user_id,
@@ -210,6 +245,38 @@ class DatabaseManager:
         finally:
             session.close()
 
+    def _upsert_subscription(
+        self,
+        insert_fn,
+        user_id: int,
+        subscription_type: str,
+        subscription_id: str,
+        subscription_name: Optional[str]
+    ) -> bool:
+        """Insert or reactivate a subscription in one statement. Returns True if a row changed."""
+        stmt = insert_fn(Subscription).values(
+            user_id=user_id,
+            subscription_type=subscription_type,
+            subscription_id=subscription_id,
+            subscription_name=subscription_name or subscription_id
+        ).on_conflict_do_update(
+            index_elements=["user_id", "subscription_type", "subscription_id"],
+            set_={"is_active": True},
+            # Only a previously cancelled subscription counts as a change
+            where=(Subscription.is_active == False)
+        )
+        session = self.get_session()
+        try:
+            result = session.execute(stmt)
+            session.commit()
+            return result.rowcount > 0
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error adding subscription: {e}", exc_info=True)
+            raise
+        finally:
+            session.close()
+
     def remove_subscription(self, user_id: int, subscription_id: int) -> bool:
         """Remove subscription by ID. Returns True if removed."""
         session = self.get_session()
@@ -227,14 +294,89 @@ class DatabaseManager:
         finally:
             session.close()
 
-    def get_user_subscriptions(self, user_id: int) -> List[Subscription]:
-        """Get all active subscriptions for a user."""
+    def get_user_subscriptions(self, user_id: int, subscription_type: Optional[str] = None) -> List[Subscription]:
+        """Get all active subscriptions for a user, optionally of a single type."""
+        session = self.get_session()
+        try:
+            query = session.query(Subscription).filter(
+                Subscription.user_id == user_id,
+                Subscription.is_active == True
+            )
+            if subscription_type:
+                query = query.filter(Subscription.subscription_type == subscription_type)
+            return query.all()
+        finally:
+            session.close()
+
+    def deactivate_keyword_subscription(self, user_id: int, keyword: str) -> bool:
+        """Deactivate a user's keyword alert. Returns True if one was active."""
+        session = self.get_session()
+        try:
+            result = session.execute(
+                update(Subscription).where(
+                    Subscription.user_id == user_id,
+                    Subscription.subscription_type == "keyword",
+                    Subscription.subscription_id == keyword,
+                    Subscription.is_active == True
+                ).values(is_active=False)
+            )
+            session.commit()
+            return result.rowcount > 0
+        finally:
+            session.close()
+
+    def count_users(self) -> int:
+        """Get the number of registered users."""
+        session = self.get_session()
+        try:
+            return session.query(User).count()
+        finally:
+            session.close()
+
+    def get_users_with_subscription_counts(self, limit: Optional[int] = None, offset: int = 0) -> list:
+        """Get (telegram_id, username, first_name, last_name, created_at, sub_count) rows, oldest users first."""
+        session = self.get_session()
+        try:
+            query = session.query(
+                User.telegram_id,
+                User.username,
+                User.first_name,
+                User.last_name,
+                User.created_at,
+                func.count(case((Subscription.is_active == True, Subscription.id))).label('sub_count')
+            ).outerjoin(
+                Subscription, Subscription.user_id == User.id
+            ).group_by(User.id).order_by(User.id)
+            if limit is not None:
+                query = query.limit(limit).offset(offset)
+            return query.all()
+        finally:
+            session.close()
+
+    def get_bot_stats(self) -> Tuple[int, int]:
+        """Get (total users, active subscriptions) counts."""
+        session = self.get_session()
+        try:
+            # Both counts as scalar subqueries of a single statement
+            total_users, active_subs = session.execute(
+                select(
+                    select(func.count(User.id)).scalar_subquery(),
+                    select(func.count(Subscription.id)).where(Subscription.is_active == True).scalar_subquery()
+                )
+            ).one()
+            return total_users, active_subs
+        finally:
+            session.close()
+
+    def get_subscription_by_id(self, user_id: int, subscription_id: int) -> Optional[Subscription]:
+        """Get a single active subscription owned by the user."""
         session = self.get_session()
         try:
             return session.query(Subscription).filter(
+                Subscription.id == subscription_id,
                 Subscription.user_id == user_id,
                 Subscription.is_active == True
-            ).all()
+            ).first()
         finally:
             session.close()
 
@@ -0,0 +1,144 @@
+"""XLSX export of the dataset catalog, written as raw SpreadsheetML."""
+
+import re
+import zipfile
+from typing import IO, Iterable, List, Tuple, Union
+from xml.sax.saxutils import escape
+
+from ..api import Dataset
+
+CATALOG_SHEET_NAME = "Catálogo Completo"
+CATALOG_COLUMNS = (
+    "ID", "Título", "Descripción", "Editor", "Temas", "Palabras Clave",
+    "Última Modificación", "Registros", "Licencia"
+)
+MAX_COLUMN_WIDTH = 50
+# Excel refuses to open cells longer than this
+MAX_CELL_LENGTH = 32767
+_ROW_BATCH_SIZE = 1000
+
+# Control characters are not allowed in XML 1.0 documents
+_ILLEGAL_XML_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# Fixed package parts: one worksheet, one bold style for the header row
+_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        _XML_DECL
+        + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        _XML_DECL
+        + f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        _XML_DECL
+        + f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+        f'<sheet name="{CATALOG_SHEET_NAME}" sheetId="1" r:id="rId1"/>'
+        '</sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        _XML_DECL
+        + f'<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        _XML_DECL
+        + f'<styleSheet xmlns="{_MAIN_NS}">'
+        '<fonts count="2">'
+        '<font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font>'
+        '</fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+CatalogRow = Tuple[str, str, str, str, str, str, str, int, str]
+
+
+def catalog_row(dataset: Dataset) -> CatalogRow:
+    """Flatten a dataset into the catalog's column order."""
+    return (
+        dataset.dataset_id or "",
+        dataset.title or "Sin título",
+        dataset.description or "Sin descripción",
+        dataset.publisher or "Sin editor",
+        ", ".join(dataset.themes) if dataset.themes else "Sin temas",
+        ", ".join(dataset.keywords) if dataset.keywords else "Sin palabras clave",
+        dataset.modified or "Sin fecha",
+        dataset.records_count if dataset.records_count is not None else 0,
+        dataset.license or "Sin licencia",
+    )
+
+
+def _cell_xml(value, style: str = "") -> str:
+    """Render one cell: numbers as values, everything else as an inline string."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"<c{style}><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML_CHARS_RE.sub("", str(value)[:MAX_CELL_LENGTH]))
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def write_catalog_xlsx(target: Union[str, IO[bytes]], datasets: Iterable[Dataset]) -> int:
+    """Write the catalog workbook to a path or binary file object and return the row count."""
+    rows: List[CatalogRow] = [catalog_row(dataset) for dataset in datasets]
+
+    # Column widths from the source rows, one max() per column; <cols> must precede the data
+    columns = list(zip(*rows)) or [()] * len(CATALOG_COLUMNS)
+    widths = [
+        max(len(header), max(map(len, map(str, column)), default=0))
+        for header, column in zip(CATALOG_COLUMNS, columns)
+    ]
+    cols = "".join(
+        f'<col min="{i}" max="{i}" width="{min(width + 2, MAX_COLUMN_WIDTH)}" customWidth="1"/>'
+        for i, width in enumerate(widths, 1)
+    )
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _STATIC_PARTS.items():
+            zf.writestr(name, content)
+
+        with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                f'{_XML_DECL}<worksheet xmlns="{_MAIN_NS}"><cols>{cols}</cols><sheetData>'.encode()
+            )
+            header = "".join(_cell_xml(value, ' s="1"') for value in CATALOG_COLUMNS)
+            sheet.write(f'<row r="1">{header}</row>'.encode())
+
+            # Serialize rows in batches so the zip stream gets a few large writes
+            for start in range(0, len(rows), _ROW_BATCH_SIZE):
+                batch = rows[start:start + _ROW_BATCH_SIZE]
+                sheet.write("".join(
+                    f'<row r="{row_number}">{"".join(map(_cell_xml, row))}</row>'
+                    for row_number, row in enumerate(batch, start + 2)
+                ).encode())
+
+            sheet.write(b"</sheetData></worksheet>")
+
+    return len(rows)
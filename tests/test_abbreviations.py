@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Tests for parsing the 'ABREVIATURAS EMPLEADAS:' block of dataset descriptions."""
+
+import os
+import sys
+
+# Add the root directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api.client import format_abbreviations, format_description
+
+
+def test_mixed_case_abbreviations():
+    text = "ABREVIATURAS EMPLEADAS: CyL: Castilla y León SACYL: Servicio de Salud de Castilla y León"
+    assert format_abbreviations(text) == (
+        "**ABREVIATURAS:**\n"
+        "• **CyL:** Castilla y León\n"
+        "• **SACYL:** Servicio de Salud de Castilla y León"
+    )
+
+
+def test_lowercase_word_with_colon_stays_in_definition():
+    text = (
+        "ABREVIATURAS EMPLEADAS: INE: Instituto Nacional de Estadística, ver palabra: clave de búsqueda "
+        "JCyL: Junta de Castilla y León"
+    )
+    assert format_abbreviations(text) == (
+        "**ABREVIATURAS:**\n"
+        "• **INE:** Instituto Nacional de Estadística, ver palabra: clave de búsqueda\n"
+        "• **JCyL:** Junta de Castilla y León"
+    )
+
+
+def test_trailing_note_is_not_merged_into_last_definition():
+    text = (
+        "ABREVIATURAS EMPLEADAS: CyL: Castilla y León INE: Instituto Nacional de Estadística "
+        "Nota: los datos son provisionales"
+    )
+    assert format_abbreviations(text) == (
+        "**ABREVIATURAS:**\n"
+        "• **CyL:** Castilla y León\n"
+        "• **INE:** Instituto Nacional de Estadística\n"
+        "• **Nota:** los datos son provisionales"
+    )
+
+
+def test_no_abbreviations():
+    assert format_abbreviations("") == ""
+    assert format_abbreviations("ABREVIATURAS EMPLEADAS: sin definiciones") == ""
+
+
+def test_description_with_abbreviations_block():
+    description = (
+        "Contratos realizados en Castilla y León. "
+        "ABREVIATURAS EMPLEADAS: CyL: Castilla y León INE: Instituto Nacional de Estadística"
+    )
+    assert format_description(description) == (
+        "Contratos realizados en Castilla y León.\n\n"
+        "**ABREVIATURAS:**\n"
+        "• **CyL:** Castilla y León\n"
+        "• **INE:** Instituto Nacional de Estadística"
+    )
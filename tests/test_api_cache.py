@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Tests for JCYLAPIClient's response cache."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the root directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import JCYLAPIClient
+
+
+def _run_with_client(test):
+    async def main():
+        client = JCYLAPIClient(cache_ttl=300)
+        try:
+            await test(client)
+        finally:
+            await client.close()
+    asyncio.run(main())
+
+
+def test_uncached_fetch_leaves_no_lock():
+    async def test(client):
+        async def fetch():
+            return [], 0  # What the fetchers return for zero hits or errors
+
+        assert await client._cached(("datasets", "sin resultados"), fetch) == ([], 0)
+        assert client._response_cache == {}
+        assert client._cache_locks == {}
+
+    _run_with_client(test)
+
+
+def test_concurrent_callers_share_one_fetch_and_release_the_lock():
+    async def test(client):
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return ["agua"], 1
+
+        results = await asyncio.gather(*(client._cached(("datasets", "agua"), fetch) for _ in range(5)))
+        assert results == [(["agua"], 1)] * 5
+        assert calls == 1
+        assert client._cache_locks == {}
+
+    _run_with_client(test)
+
+
+def test_failed_fetch_releases_the_lock():
+    async def test(client):
+        async def fetch():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await client._cached(("datasets", "error"), fetch)
+        assert client._cache_locks == {}
+
+    _run_with_client(test)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Tests for caching of the /catalogo workbook."""
+
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Add the root directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api import Dataset
+from src.bot import handlers
+
+TOTAL_DATASETS = 350
+
+
+def _fake_get_datasets(failing_offset=None):
+    """get_datasets stand-in serving TOTAL_DATASETS in pages; a failing page comes back empty like on HTTP errors."""
+    async def get_datasets(limit=10, offset=0, **kwargs):
+        if offset == failing_offset:
+            return [], 0
+        count = max(0, min(limit, TOTAL_DATASETS - offset))
+        return [Dataset(dataset_id=f"ds-{offset + i}", title=f"Dataset {offset + i}") for i in range(count)], TOTAL_DATASETS
+    return get_datasets
+
+
+def _fake_update():
+    update = MagicMock()
+    update.message.reply_text = AsyncMock(return_value=AsyncMock())
+    update.message.reply_document = AsyncMock()
+    return update
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog_cache(monkeypatch):
+    monkeypatch.setattr(handlers, "_catalog_cache", {})
+    monkeypatch.setattr(handlers, "_catalog_lock", asyncio.Lock())
+
+
+def test_complete_catalog_is_cached(monkeypatch):
+    monkeypatch.setattr(handlers.api_client, "get_datasets", _fake_get_datasets())
+    update = _fake_update()
+
+    asyncio.run(handlers.export_catalog_command(update, MagicMock()))
+
+    update.message.reply_document.assert_awaited_once()
+    _, _, dataset_count = handlers._catalog_cache["xlsx"]
+    assert dataset_count == TOTAL_DATASETS
+
+
+def test_catalog_with_failed_page_is_not_cached(monkeypatch):
+    monkeypatch.setattr(handlers.api_client, "get_datasets", _fake_get_datasets(failing_offset=200))
+    update = _fake_update()
+
+    asyncio.run(handlers.export_catalog_command(update, MagicMock()))
+
+    # The partial workbook is still sent to this caller, but not reused
+    update.message.reply_document.assert_awaited_once()
+    assert handlers._catalog_cache == {}
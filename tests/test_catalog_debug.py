@@ -5,13 +5,12 @@ import asyncio
 import logging
 import os
 import sys
-import pandas as pd
-import tempfile
 
 # Add the root directory to the path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.api import JCYLAPIClient
+from src.services.catalog_export import CATALOG_COLUMNS, catalog_row, write_catalog_xlsx
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,42 +29,16 @@ async def test_catalog_debug():
             logger.error("No datasets returned!")
             return
         
-        logger.info("=== STEP 2: Prepare data ===")
-        catalog_data = []
+        logger.info("=== STEP 2: Prepare rows ===")
         for i, dataset in enumerate(datasets):
             logger.info(f"Processing dataset {i+1}: {dataset.dataset_id}")
-            
-            row_data = {
-                'ID': dataset.dataset_id or '',
-                'Título': dataset.title or 'Sin título',
-                'Descripción': (dataset.description or 'Sin descripción')[:100],
-                'Editor': dataset.publisher or 'Sin editor',
-                'Temas': ', '.join(dataset.themes) if dataset.themes else 'Sin temas',
-                'Palabras Clave': ', '.join(dataset.keywords) if dataset.keywords else 'Sin palabras clave',
-                'Última Modificación': dataset.modified or 'Sin fecha',
-                'Registros': dataset.records_count if dataset.records_count is not None else 0,
-                'Licencia': dataset.license or 'Sin licencia'
-            }
-            
-            logger.info(f"Row data: {row_data}")
-            catalog_data.append(row_data)
+            logger.info(f"Row data: {dict(zip(CATALOG_COLUMNS, catalog_row(dataset)))}")
         
-        logger.info("=== STEP 3: Create DataFrame ===")
-        df = pd.DataFrame(catalog_data)
-        logger.info(f"DataFrame shape: {df.shape}")
-        logger.info(f"DataFrame columns: {list(df.columns)}")
-        logger.info(f"DataFrame head:\n{df.head()}")
-        
-        if df.empty:
-            logger.error("DataFrame is EMPTY!")
-            return
-        
-        logger.info("=== STEP 4: Create Excel file ===")
+        logger.info("=== STEP 3: Create Excel file ===")
         filename = "debug_catalog.xlsx"
         
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Test Catalog', index=False)
-            logger.info("Excel file written successfully")
+        row_count = write_catalog_xlsx(filename, datasets)
+        logger.info(f"Excel file written successfully ({row_count} rows)")
         
         # Check file size
         file_size = os.path.getsize(filename)
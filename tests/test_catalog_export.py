@@ -2,17 +2,24 @@
 """Test script for catalog export functionality."""
 
 import asyncio
+import io
 import logging
 import os
 import sys
 from datetime import datetime
 
+import openpyxl
+
 # Add the root directory to the path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.api import JCYLAPIClient
-import pandas as pd
-import tempfile
+from src.api import JCYLAPIClient, Dataset
+from src.services.catalog_export import (
+    CATALOG_COLUMNS,
+    CATALOG_SHEET_NAME,
+    MAX_CELL_LENGTH,
+    write_catalog_xlsx,
+)
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -21,86 +28,103 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+def _load_sheet(datasets):
+    """Write datasets with write_catalog_xlsx and load the result back with openpyxl."""
+    buffer = io.BytesIO()
+    row_count = write_catalog_xlsx(buffer, datasets)
+    buffer.seek(0)
+    workbook = openpyxl.load_workbook(buffer)
+    assert workbook.sheetnames == [CATALOG_SHEET_NAME]
+    rows = list(workbook[CATALOG_SHEET_NAME].iter_rows(values_only=True))
+    return row_count, rows
+
+
+def test_write_catalog_xlsx_roundtrip():
+    """Header, escaping, control characters, truncation and row count survive an openpyxl load."""
+    datasets = [
+        Dataset(
+            dataset_id="contratos",
+            title='Contratos & licitaciones <2024> "Junta"',
+            description="Línea\x00con\x0bcontrol\x1fchars",
+            publisher="Consejería de Economía",
+            themes=["Economía", "Sector público"],
+            keywords=["contratos"],
+            modified="2024-05-01T10:00:00+00:00",
+            records_count=1234,
+            license="CC BY 4.0",
+        ),
+        Dataset(dataset_id="largo", title="Descripción larga", description="x" * (MAX_CELL_LENGTH + 100)),
+        Dataset(dataset_id="vacio", title="", description=None, publisher=None, license=None,
+                modified=None, records_count=None),
+    ]
+
+    row_count, rows = _load_sheet(datasets)
+
+    assert row_count == 3
+    assert len(rows) == 4
+    assert rows[0] == CATALOG_COLUMNS
+
+    first = rows[1]
+    assert first[0] == "contratos"
+    assert first[1] == 'Contratos & licitaciones <2024> "Junta"'
+    assert first[2] == "Líneaconcontrolchars"
+    assert first[4] == "Economía, Sector público"
+    assert first[7] == 1234
+
+    assert len(rows[2][2]) == MAX_CELL_LENGTH
+
+    empty = rows[3]
+    assert empty[1:4] == ("Sin título", "Sin descripción", "Sin editor")
+    assert empty[4:] == ("Sin temas", "Sin palabras clave", "Sin fecha", 0, "Sin licencia")
+
+
+def test_write_catalog_xlsx_empty():
+    """An empty catalog still produces a valid workbook with just the header."""
+    row_count, rows = _load_sheet([])
+    assert row_count == 0
+    assert rows == [CATALOG_COLUMNS]
+
+
 async def test_catalog_export():
     """Test the catalog export functionality."""
     logger.info("=== TESTING CATALOG EXPORT ===")
-    
+
     api_client = JCYLAPIClient()
-    
+
     try:
         # Get sample datasets for testing (small amount)
         logger.info("Fetching sample datasets...")
         datasets, total_estimate = await api_client.get_datasets(limit=10, offset=0)
         logger.info(f"Retrieved {len(datasets)} datasets out of {total_estimate} total")
-        
+
         if not datasets:
             logger.error("No datasets retrieved!")
             return
-        
-        # Prepare data for Excel
-        logger.info("Preparing Excel data...")
-        catalog_data = []
-        for dataset in datasets:
-            catalog_data.append({
-                'ID': dataset.dataset_id,
-                'Título': dataset.title,
-                'Descripción': dataset.description[:100] + "..." if len(dataset.description) > 100 else dataset.description,
-                'Editor': dataset.publisher,
-                'Temas': ', '.join(dataset.themes) if dataset.themes else '',
-                'Palabras Clave': ', '.join(dataset.keywords) if dataset.keywords else '',
-                'Última Modificación': dataset.modified,
-                'Registros': dataset.records_count,
-                'Licencia': dataset.license
-            })
-        
-        # Create DataFrame
-        logger.info("Creating DataFrame...")
-        df = pd.DataFrame(catalog_data)
-        logger.info(f"DataFrame created with {len(df)} rows and {len(df.columns)} columns")
-        
-        # Create Excel file
+
+        # Create Excel file with the same writer /catalogo uses
         current_date = datetime.now().strftime("%Y-%m-%d")
         filename = f"test_catalogo_datos_abiertos_cyl_{current_date}.xlsx"
-        
+
         logger.info(f"Creating Excel file: {filename}")
-        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp_file:
-            with pd.ExcelWriter(tmp_file.name, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Catálogo Completo', index=False)
-                
-                # Auto-adjust column widths
-                worksheet = writer.sheets['Catálogo Completo']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            # Copy to final filename
-            import shutil
-            shutil.copy2(tmp_file.name, filename)
-            os.unlink(tmp_file.name)
-        
-        logger.info(f"✅ Excel file created successfully: {filename}")
+        row_count = write_catalog_xlsx(filename, datasets)
+
+        logger.info(f"✅ Excel file created successfully: {filename} ({row_count} rows)")
         logger.info(f"File size: {os.path.getsize(filename)} bytes")
-        
+
         # Show first few rows
         logger.info("Sample data:")
-        for i, row in df.head(3).iterrows():
-            logger.info(f"  Row {i+1}: {row['Título'][:50]}...")
-        
+        sheet = openpyxl.load_workbook(filename)[CATALOG_SHEET_NAME]
+        for i, row in enumerate(sheet.iter_rows(min_row=2, max_row=4, values_only=True), 1):
+            logger.info(f"  Row {i}: {row[1][:50]}...")
+
     except Exception as e:
         logger.error(f"❌ Error in catalog export test: {e}", exc_info=True)
-    
+
     finally:
         await api_client.close()
-    
+
     logger.info("=== TEST COMPLETED ===")
 
 if __name__ == "__main__":
-    asyncio.run(test_catalog_export())
\ No newline at end of file
+    asyncio.run(test_catalog_export())
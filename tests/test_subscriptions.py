@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Tests for DatabaseManager.add_subscription on sqlite."""
+
+import os
+import sys
+
+import pytest
+
+# Add the root directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import database
+from src.models import DatabaseManager
+
+
+@pytest.fixture(params=["upsert", "fallback"])
+def db(request, tmp_path, monkeypatch):
+    """Fresh sqlite database, exercising both the ON CONFLICT and the select-then-insert path."""
+    if request.param == "fallback":
+        monkeypatch.setattr(database, "_UPSERT_INSERTS", {})
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'subscriptions.db'}")
+    manager.create_tables()
+    return manager
+
+
+def test_add_subscription_return_values(db):
+    user_id = db.get_or_create_user(telegram_id=12345)
+
+    # New subscription
+    assert db.add_subscription(user_id, "theme", "Salud") is True
+    # Already active
+    assert db.add_subscription(user_id, "theme", "Salud") is False
+
+    subscription = db.get_user_subscriptions(user_id)[0]
+    assert db.remove_subscription(user_id, subscription.id) is True
+    assert db.get_user_subscriptions(user_id) == []
+
+    # Cancelled, then added again: reactivated
+    assert db.add_subscription(user_id, "theme", "Salud") is True
+    assert [s.subscription_id for s in db.get_user_subscriptions(user_id)] == ["Salud"]